@@ -4,10 +4,128 @@ import re
 import csv
 import io
 import uuid
+import socket
 import json
+import hashlib
+import zlib
+import base64
+import itertools
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import atexit
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from xml.sax.saxutils import escape
 from flask import Flask, request, jsonify, Response
 import requests
+from requests.adapters import HTTPAdapter
+
+# Logging
+# LOG_LEVEL gates output (DEBUG noise is skipped before any formatting),
+# LOG_FORMAT=json emits one JSON object per line, and LOG_SAMPLE_RATE keeps
+# only a fraction of per-row diagnostics logged with extra=SAMPLED
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 0.01))
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))
+
+SAMPLED = {"sampled": True}
+
+_LOG_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "sampled"}
+
+class JsonLogFormatter(logging.Formatter):
+    """Format records as single-line JSON, including any extra= fields"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _LOG_RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class SampleFilter(logging.Filter):
+    """Let through only LOG_SAMPLE_RATE of the records marked as sampled"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if getattr(record, "sampled", False):
+            return random.random() < self.rate
+        return True
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hand records to the listener thread without ever blocking the caller
+    When the queue is full the record is dropped and counted instead
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+logger = logging.getLogger('sms_webhook')
+_log_listener = None
+
+def setup_logging():
+    """Route the app logger through a bounded queue to a stdout writer thread"""
+    global _log_listener
+    if _log_listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == 'json':
+        stream_handler.setFormatter(JsonLogFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s [%(threadName)s] %(message)s"
+        ))
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = DroppingQueueHandler(log_queue)
+
+    logger.setLevel(LOG_LEVEL)
+    logger.addFilter(SampleFilter(LOG_SAMPLE_RATE))
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+
+    _log_listener = logging.handlers.QueueListener(log_queue, stream_handler)
+    _log_listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _log_listener
+    if _log_listener is None:
+        return
+    _log_listener.stop()
+    _log_listener = None
+    for handler in logger.handlers:
+        if isinstance(handler, DroppingQueueHandler) and handler.dropped:
+            sys.stdout.write(f"Logging queue full: dropped {handler.dropped} records\n")
+
+setup_logging()
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -15,9 +133,59 @@ app = Flask(__name__)
 # Database path
 DB_PATH = "survey_responses.db"
 
+# SQLite connection settings
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', 5000))
+DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', 256))
+
+_db_local = threading.local()
+
+def connect_db():
+    """Open a new SQLite connection with the app's standard settings"""
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        cached_statements=DB_STATEMENT_CACHE_SIZE
+    )
+    # WAL lets webhook writes and campaign updates proceed alongside readers;
+    # synchronous=NORMAL is durable across application crashes in WAL mode
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
+    return conn
+
+def get_db():
+    """
+    Return the calling thread's pooled connection, opening it on first use
+    Each request thread and worker thread keeps one connection for its lifetime
+    """
+    conn = getattr(_db_local, 'conn', None)
+    if conn is None:
+        conn = connect_db()
+        _db_local.conn = conn
+    return conn
+
+def release_db(conn):
+    """Hand a pooled connection back, discarding any work that wasn't committed"""
+    if conn.in_transaction:
+        conn.rollback()
+
+def close_db():
+    """Close the calling thread's pooled connection"""
+    conn = getattr(_db_local, 'conn', None)
+    if conn is not None:
+        _db_local.conn = None
+        conn.close()
+
+@app.teardown_request
+def release_request_db(exc):
+    """Make sure a request never leaves an open transaction on its thread's connection"""
+    conn = getattr(_db_local, 'conn', None)
+    if conn is not None:
+        release_db(conn)
+
 def init_database():
     """Initialize database with required tables"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_db()
     cursor = conn.cursor()
     
     # Create participants table
@@ -25,6 +193,7 @@ def init_database():
         CREATE TABLE IF NOT EXISTS participants (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             phone_number TEXT UNIQUE,
+            phone_e164 TEXT,
             consent_status TEXT DEFAULT 'pending',
             consent_timestamp DATETIME,
             email TEXT,
@@ -37,7 +206,9 @@ def init_database():
             education TEXT,
             phone_type TEXT,
             region TEXT,
-            notes TEXT
+            notes TEXT,
+            upload_id TEXT,
+            age_num INTEGER
         )
     ''')
     
@@ -51,152 +222,934 @@ def init_database():
         )
     ''')
     
+    # Create send jobs table (persistent queue for outbound campaigns)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS send_jobs (
+            id TEXT PRIMARY KEY,
+            job_type TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT DEFAULT 'queued',
+            total INTEGER DEFAULT 0,
+            processed INTEGER DEFAULT 0,
+            success_count INTEGER DEFAULT 0,
+            failed_count INTEGER DEFAULT 0,
+            failures TEXT,
+            error TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            started_at DATETIME,
+            finished_at DATETIME,
+            updated_at DATETIME,
+            lease_owner TEXT,
+            lease_expires_at REAL
+        )
+    ''')
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_send_jobs_status ON send_jobs (status, created_at)"
+    )
+    
+    # Create campaigns table (one row per survey URL)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS campaigns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            survey_url TEXT NOT NULL UNIQUE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Per-campaign delivery state. Keyed (campaign_id, participant_id) without
+    # a rowid, so "has participant P had campaign C" is a single b-tree probe
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS campaign_recipients (
+            campaign_id INTEGER NOT NULL,
+            participant_id INTEGER NOT NULL,
+            status TEXT NOT NULL,
+            message_sid TEXT,
+            attempts INTEGER NOT NULL DEFAULT 1,
+            sent_at DATETIME,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            lease_owner TEXT,
+            lease_expires_at REAL,
+            PRIMARY KEY (campaign_id, participant_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_campaign_recipients_participant ON campaign_recipients (participant_id)"
+    )
+    # Joins delivery receipts back to the campaign send they belong to
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_campaign_recipients_sid ON campaign_recipients (message_sid) "
+        "WHERE message_sid IS NOT NULL"
+    )
+    
+    # Append-only log of Twilio delivery receipts. Deliberately left without
+    # secondary indexes so callback storms cost one b-tree append per row
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS message_status_events (
+            id INTEGER PRIMARY KEY,
+            message_sid TEXT NOT NULL,
+            status TEXT NOT NULL,
+            error_code TEXT,
+            to_number TEXT,
+            received_at DATETIME NOT NULL
+        )
+    ''')
+    
+    # Change counters bumped in the same transaction as the data they cover,
+    # so every process can tell when its caches are stale (see FilterOptionsCache)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    
+    # Outbound rate limiter state shared by every process (see SharedTokenBucket)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rate_limits (
+            name TEXT PRIMARY KEY,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    ''')
+    
+    # Every message we send that Twilio gave a SID for, so delivery receipts
+    # can be matched to what was sent (join message_status_events on message_sid)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS outbound_messages (
+            message_sid TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            to_number TEXT NOT NULL,
+            job_id TEXT,
+            sent_at DATETIME NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    
+    # Auto-replies waiting for the rate limiter (see queue_reply). A row is
+    # deleted once its reply has gone out, so replies outlive a restart
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS outbound_replies (
+            id INTEGER PRIMARY KEY,
+            to_number TEXT NOT NULL,
+            body TEXT NOT NULL,
+            lease_owner TEXT,
+            lease_expires_at REAL,
+            created_at DATETIME NOT NULL
+        )
+    ''')
+    
+    # Durable inbound queue for fast-ack webhooks (WEBHOOK_INGEST_MODE=queue).
+    # Rows are deleted once processed; responses keeps the permanent record.
+    # Messages that keep failing stay behind with status 'failed'
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS inbound_messages (
+            id INTEGER PRIMARY KEY,
+            from_number TEXT NOT NULL,
+            phone_e164 TEXT NOT NULL,
+            body TEXT NOT NULL,
+            message_sid TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            lease_owner TEXT,
+            lease_expires_at REAL,
+            last_error TEXT,
+            received_at DATETIME NOT NULL
+        )
+    ''')
+    ensure_column(cursor, "inbound_messages", "last_error", "TEXT")
+    # Per-phone ordering check: "is there an earlier unfinished message from this number"
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_inbound_messages_phone ON inbound_messages (phone_e164, id)"
+    )
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_inbound_messages_sid ON inbound_messages (message_sid) "
+        "WHERE message_sid IS NOT NULL"
+    )
+    
+    # Leases let several processes share the send queue (see claim_next_job)
+    ensure_column(cursor, "send_jobs", "lease_owner", "TEXT")
+    ensure_column(cursor, "send_jobs", "lease_expires_at", "REAL")
+    ensure_column(cursor, "campaign_recipients", "lease_owner", "TEXT")
+    ensure_column(cursor, "campaign_recipients", "lease_expires_at", "REAL")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_campaign_recipients_lease ON campaign_recipients (lease_owner) "
+        "WHERE status = 'sending'"
+    )
+    
+    migrate_phone_e164(conn)
+    
+    # Tag of the CSV upload that last touched each participant
+    ensure_column(cursor, "participants", "upload_id", "TEXT")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_participants_upload_id ON participants (upload_id)"
+    )
+    
+    migrate_participant_segments(cursor)
+    migrate_full_text_search(cursor)
+    
+    # Campaign sends page through consented participants in id order
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_participants_consent ON participants (consent_status)"
+    )
+    
+    # Keyset pagination for /participants walks this index newest-first
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_participants_created_id ON participants (created_at, id)"
+    )
+    # Date-range exports of responses
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_responses_timestamp ON responses (timestamp)"
+    )
+    
+    # Twilio retries a slow webhook with the same MessageSid; the unique index
+    # turns a retry into a no-op (see process_sms_response)
+    ensure_column(cursor, "responses", "message_sid", "TEXT")
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_responses_message_sid ON responses (message_sid) "
+        "WHERE message_sid IS NOT NULL"
+    )
+    
     conn.commit()
     conn.close()
 
-def send_sms(to_number, message_body):
-    """Send SMS using Twilio API"""
-    account_sid = os.getenv('TWILIO_ACCOUNT_SID')
-    auth_token = os.getenv('TWILIO_AUTH_TOKEN')
-    phone_number = os.getenv('TWILIO_PHONE_NUMBER')
+# Integer age for range filters; NULL when the imported age isn't a number
+AGE_NUM_EXPRESSION = "CASE WHEN trim({age}) GLOB '[0-9]*' THEN CAST(trim({age}) AS INTEGER) END"
+
+# Segment indexes for search_participants. Each leads with consent_status
+# (every search is limited to consented participants) and, where the filter
+# is an equality, ends with created_at so results come back already sorted.
+PARTICIPANT_SEGMENT_INDEXES = {
+    'idx_participants_consent_created': "consent_status, created_at",
+    'idx_participants_consent_gender': "consent_status, gender COLLATE NOCASE, created_at",
+    'idx_participants_consent_phone_type': "consent_status, phone_type COLLATE NOCASE, created_at",
+    'idx_participants_consent_age': "consent_status, age_num, created_at",
+    'idx_participants_consent_survey': "consent_status, survey_sent, created_at",
+}
+
+def migrate_participant_segments(cursor):
+    """Add age_num, keep it in sync with age, and create the segment indexes"""
+    if ensure_column(cursor, "participants", "age_num", "INTEGER"):
+        cursor.execute(
+            f"UPDATE participants SET age_num = {AGE_NUM_EXPRESSION.format(age='age')}"
+        )
+        logger.info("Backfilled age_num for %d participants", cursor.rowcount)
+    
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS participants_age_num_insert
+        AFTER INSERT ON participants
+        WHEN NEW.age IS NOT NULL
+        BEGIN
+            UPDATE participants SET age_num = {AGE_NUM_EXPRESSION.format(age='NEW.age')}
+            WHERE id = NEW.id;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS participants_age_num_update
+        AFTER UPDATE OF age ON participants
+        BEGIN
+            UPDATE participants SET age_num = {AGE_NUM_EXPRESSION.format(age='NEW.age')}
+            WHERE id = NEW.id;
+        END
+    ''')
+    
+    for name, columns in PARTICIPANT_SEGMENT_INDEXES.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON participants ({columns})")
+
+# Full-text indexes: external-content FTS5 tables over the source columns,
+# kept in sync by triggers. name -> (source table, indexed column)
+FULL_TEXT_INDEXES = {
+    'participants_fts': ('participants', 'notes'),
+    'responses_fts': ('responses', 'message_body'),
+}
+
+# Set by migrate_full_text_search; False when this SQLite build lacks FTS5
+FULL_TEXT_SEARCH_AVAILABLE = False
+
+def migrate_full_text_search(cursor):
+    """Create the FTS5 indexes and their sync triggers, building any new index from its table"""
+    global FULL_TEXT_SEARCH_AVAILABLE
     
-    if not all([account_sid, auth_token, phone_number]):
-        print("ERROR: Twilio credentials not set")
+    for fts_table, (table, column) in FULL_TEXT_INDEXES.items():
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts_table,)
+        )
+        exists = cursor.fetchone() is not None
+        
+        try:
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                    {column}, content='{table}', content_rowid='id',
+                    tokenize='porter unicode61'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            logger.warning("Full-text search disabled, FTS5 is not available: %s", e)
+            FULL_TEXT_SEARCH_AVAILABLE = False
+            return
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO {fts_table} (rowid, {column}) VALUES (NEW.id, NEW.{column});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, {column}) VALUES ('delete', OLD.id, OLD.{column});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts_table}_update AFTER UPDATE OF {column} ON {table}
+            BEGIN
+                INSERT INTO {fts_table} ({fts_table}, rowid, {column}) VALUES ('delete', OLD.id, OLD.{column});
+                INSERT INTO {fts_table} (rowid, {column}) VALUES (NEW.id, NEW.{column});
+            END
+        ''')
+        
+        if not exists:
+            cursor.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+            logger.info("Built full-text index %s over %s.%s", fts_table, table, column)
+    
+    FULL_TEXT_SEARCH_AVAILABLE = True
+
+def ensure_column(cursor, table, column, definition):
+    """Add a column to an existing table if it isn't there yet; returns True if added"""
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+    if column in columns:
         return False
+    logger.info("Migrating %s: adding %s column", table, column)
+    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return True
+
+def migrate_phone_e164(conn):
+    """
+    Add and backfill the canonical phone_e164 column on participants.
+    Rows that collapse to the same E.164 number are merged into the oldest
+    one before the unique index is created.
+    """
+    cursor = conn.cursor()
+    
+    ensure_column(cursor, "participants", "phone_e164", "TEXT")
+    
+    # Backfill rows written before the column existed
+    conn.create_function("to_e164", 1, to_e164, deterministic=True)
+    cursor.execute("UPDATE participants SET phone_e164 = to_e164(phone_number) WHERE phone_e164 IS NULL")
+    if cursor.rowcount:
+        logger.info("Backfilled phone_e164 for %d participants", cursor.rowcount)
+    
+    duplicates = cursor.execute(
+        "SELECT phone_e164 FROM participants WHERE phone_e164 IS NOT NULL GROUP BY phone_e164 HAVING COUNT(*) > 1"
+    ).fetchall()
+    for (phone_e164,) in duplicates:
+        merge_duplicate_participants(cursor, phone_e164)
+    if duplicates:
+        logger.info("Merged duplicate participants for %d phone numbers", len(duplicates))
+    
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_participants_phone_e164 ON participants (phone_e164)"
+    )
+
+def merge_duplicate_participants(cursor, phone_e164):
+    """Collapse all participants sharing phone_e164 into the oldest row"""
+    cursor.execute("SELECT * FROM participants WHERE phone_e164 = ? ORDER BY id", (phone_e164,))
+    column_names = [description[0] for description in cursor.description]
+    rows = [dict(zip(column_names, row)) for row in cursor.fetchall()]
+    
+    survivor = rows[0]
+    merged = dict(survivor)
+    
+    # Fill gaps in the survivor from the most recent duplicate that has a value
+    for row in reversed(rows[1:]):
+        for column, value in row.items():
+            if merged[column] in (None, '') and value not in (None, ''):
+                merged[column] = value
+    
+    # An opt-out anywhere wins; otherwise keep any consent we've recorded
+    statuses = [row['consent_status'] for row in rows]
+    if 'declined' in statuses:
+        merged['consent_status'] = 'declined'
+    elif 'consented' in statuses:
+        merged['consent_status'] = 'consented'
+        merged['consent_timestamp'] = max(
+            (row['consent_timestamp'] for row in rows if row['consent_timestamp']), default=None
+        )
+    merged['survey_sent'] = max(row['survey_sent'] or 0 for row in rows)
+    merged['created_at'] = min((row['created_at'] for row in rows if row['created_at']), default=None)
+    
+    cursor.execute(
+        "DELETE FROM participants WHERE phone_e164 = ? AND id != ?",
+        (phone_e164, survivor['id'])
+    )
+    updates = [column for column in column_names if column != 'id']
+    cursor.execute(
+        f"UPDATE participants SET {', '.join(f'{column} = ?' for column in updates)} WHERE id = ?",
+        [merged[column] for column in updates] + [survivor['id']]
+    )
+
+# Twilio HTTP settings. Timeouts are (connect, read) in seconds so a hung
+# socket can never stall a send loop indefinitely.
+TWILIO_API_BASE = os.getenv('TWILIO_API_BASE', 'https://api.twilio.com')
+TWILIO_CONNECT_TIMEOUT = float(os.getenv('TWILIO_CONNECT_TIMEOUT', 5))
+TWILIO_READ_TIMEOUT = float(os.getenv('TWILIO_READ_TIMEOUT', 15))
+TWILIO_POOL_SIZE = int(os.getenv('TWILIO_POOL_SIZE', 20))
+# Public URL of /status_callback; when set, Twilio posts delivery receipts there
+TWILIO_STATUS_CALLBACK_URL = os.getenv('TWILIO_STATUS_CALLBACK_URL')
+
+class TwilioClient:
+    """
+    Long-lived Twilio REST client.
+    
+    Credentials are resolved once and requests go through a single
+    requests.Session whose urllib3 pool keeps TLS connections to Twilio
+    alive between messages. The session is never mutated after construction,
+    so one instance can be shared by every sending thread.
+    """
+    
+    def __init__(self, account_sid, auth_token, from_number, api_base=TWILIO_API_BASE,
+                 pool_size=TWILIO_POOL_SIZE,
+                 timeout=(TWILIO_CONNECT_TIMEOUT, TWILIO_READ_TIMEOUT),
+                 status_callback=None):
+        self.account_sid = account_sid
+        self.from_number = from_number
+        self.timeout = timeout
+        self.status_callback = status_callback
+        self.messages_url = f"{api_base.rstrip('/')}/2010-04-01/Accounts/{account_sid}/Messages.json"
+        
+        self.session = requests.Session()
+        self.session.auth = (account_sid, auth_token)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
-    url = f"https://api.twilio.com/2010-04-01/Accounts/{account_sid}/Messages.json"
+    @classmethod
+    def from_env(cls):
+        """Build a client from the TWILIO_* environment variables, or None if unset"""
+        account_sid = os.getenv('TWILIO_ACCOUNT_SID')
+        auth_token = os.getenv('TWILIO_AUTH_TOKEN')
+        phone_number = os.getenv('TWILIO_PHONE_NUMBER')
+        
+        if not all([account_sid, auth_token, phone_number]):
+            return None
+        return cls(account_sid, auth_token, phone_number, status_callback=TWILIO_STATUS_CALLBACK_URL)
     
-    response = requests.post(
-        url,
-        auth=(account_sid, auth_token),
-        data={
+    def send_message(self, to_number, message_body):
+        """POST a message to the Twilio Messages API and return the response"""
+        data = {
             'To': to_number,
-            'From': phone_number,
+            'From': self.from_number,
             'Body': message_body
         }
-    )
+        if self.status_callback:
+            data['StatusCallback'] = self.status_callback
+        return self.session.post(self.messages_url, data=data, timeout=self.timeout)
+    
+    def close(self):
+        self.session.close()
+
+twilio_client = TwilioClient.from_env()
+
+def send_sms(to_number, message_body):
+    """
+    Send SMS using Twilio API
+    Returns the message SID on success (True if Twilio's response had none)
+    and False on failure
+    """
+    if twilio_client is None:
+        logger.error("Twilio credentials not set")
+        return False
+    
+    try:
+        response = twilio_client.send_message(to_number, message_body)
+    except requests.RequestException as e:
+        logger.warning("Failed to send SMS to %s: %s", to_number, e)
+        return False
     
     if response.status_code == 201:
-        print(f"SMS sent successfully to {to_number}")
-        return True
+        logger.debug("SMS sent successfully to %s", to_number)
+        try:
+            return response.json().get('sid') or True
+        except ValueError:
+            return True
     else:
-        print(f"Failed to send SMS to {to_number}. Status: {response.status_code}")
+        logger.warning("Failed to send SMS to %s. Status: %s", to_number, response.status_code)
+        return False
+
+# Outbound rate limit shared by every sender in every process (gunicorn
+# workers included). Set these to the throughput of your Twilio sender (e.g. 1
+# for a long code, 30+ for a toll-free number, short code or messaging service).
+SMS_RATE_PER_SECOND = float(os.getenv('SMS_RATE_PER_SECOND', 1))
+SMS_RATE_BURST = max(1, int(os.getenv('SMS_RATE_BURST', 1)))
+
+class SharedTokenBucket:
+    """
+    Token bucket kept in the rate_limits table, so all processes draw on one budget
+    Each acquire reserves a token in a single upsert; when the bucket is empty
+    the balance goes negative and the caller waits until its token is due.
+    Reservations are served in the order they were made.
+    """
+    
+    def __init__(self, name, rate, burst):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = max(1, int(burst))
+    
+    def _reserve(self):
+        """Take a token and return how many seconds until it may be used"""
+        now = time.time()
+        conn = get_db()
+        try:
+            tokens = conn.execute(
+                """INSERT INTO rate_limits (name, tokens, updated_at) VALUES (?, ?, ?)
+                   ON CONFLICT(name) DO UPDATE SET
+                       tokens = MIN(?, tokens + MAX(0, excluded.updated_at - updated_at) * ?) - 1,
+                       updated_at = excluded.updated_at
+                   RETURNING tokens""",
+                (self.name, self.capacity - 1, now, self.capacity, self.rate)
+            ).fetchone()[0]
+            conn.commit()
+        finally:
+            release_db(conn)
+        return max(0.0, -tokens / self.rate)
+    
+    def _refund(self):
+        """Give back a reserved token that won't be used"""
+        conn = get_db()
+        try:
+            conn.execute("UPDATE rate_limits SET tokens = tokens + 1 WHERE name = ?", (self.name,))
+            conn.commit()
+        finally:
+            release_db(conn)
+    
+    def acquire(self, cancel=None):
+        """
+        Block until a token is available, then take it
+        Returns False without waiting it out if the cancel event is set first;
+        the reservation is given back so the next process doesn't inherit the wait
+        """
+        wait = self._reserve()
+        if wait and cancel is not None:
+            if cancel.wait(wait):
+                self._refund()
+                return False
+            return True
+        if wait:
+            time.sleep(wait)
+        return True
+
+outbound_rate_limiter = SharedTokenBucket('sms', SMS_RATE_PER_SECOND, SMS_RATE_BURST)
+
+# Number of Twilio requests kept in flight at once across the whole process.
+# Throughput is still capped by outbound_rate_limiter.
+SMS_MAX_IN_FLIGHT = int(os.getenv('SMS_MAX_IN_FLIGHT', 10))
+
+_send_executor = None
+_send_executor_lock = threading.Lock()
+
+# Set when the process is shutting down; send loops stop taking new recipients
+_shutting_down = threading.Event()
+
+class SendInterrupted(Exception):
+    """Raised by dispatch_messages when shutdown stopped it before the last recipient"""
+
+def get_send_executor():
+    """Return the shared thread pool that performs outbound sends"""
+    global _send_executor
+    with _send_executor_lock:
+        if _send_executor is None:
+            _send_executor = ThreadPoolExecutor(
+                max_workers=SMS_MAX_IN_FLIGHT, thread_name_prefix="sms-send"
+            )
+        return _send_executor
+
+def _rate_limited_send(to_number, message_body):
+    """Wait for the rate limiter, then send (used for one-off sends such as auto-replies)"""
+    if not outbound_rate_limiter.acquire(cancel=_shutting_down):
+        logger.warning("Shutting down; message to %s not sent", to_number)
         return False
+    return send_sms(to_number, message_body)
+
+def dispatch_messages(entries, kind, progress=None, on_sent=None, on_failed=None):
+    """
+    Send messages concurrently and collect per-recipient results in input order.
+    
+    entries yields (phone, message, reason) tuples. Entries with a message are
+    sent; entries without one are recorded as failed with the given reason,
+    and a phone of None marks a blank row that only advances the progress
+    offset. on_sent(phone, sid) and on_failed(phone, reason) are called from
+    the calling thread as each result settles; sid is the Twilio message SID,
+    or None if it isn't known. Every SID is recorded in outbound_messages
+    under kind ('consent', 'mass_sms' or 'survey').
+    
+    Rate limiting happens here, in entry order, before a send is handed to the
+    pool, so the pool only ever holds requests that are already going out. On
+    shutdown (including while waiting for a token) no new sends are started:
+    the ones in flight are settled and recorded, then SendInterrupted is raised.
+    """
+    results = {"success": [], "failed": []}
+    executor = get_send_executor()
+    window = SMS_MAX_IN_FLIGHT * 2
+    pending = deque()
+    in_flight = 0
+    
+    def settle():
+        phone, future, reason = pending.popleft()
+        if phone is None:
+            if progress:
+                progress.skip()
+            return 0
+        
+        sid = None
+        if future is not None:
+            try:
+                sid = future.result()
+            except Exception as e:
+                logger.error("Error sending SMS to %s: %s", phone, e)
+                sid = False
+            ok = bool(sid)
+            reason = None if ok else "Failed to send SMS"
+        else:
+            ok = False
+        
+        if ok:
+            results["success"].append(phone)
+            if isinstance(sid, str):
+                record_outbound_message(sid, kind, phone, progress.job_id if progress else None)
+            if on_sent:
+                on_sent(phone, sid if isinstance(sid, str) else None)
+        else:
+            results["failed"].append({"phone": phone, "reason": reason})
+            if on_failed:
+                on_failed(phone, reason)
+        if progress:
+            progress.record(phone, ok, reason)
+        return 1 if future is not None else 0
+    
+    def interrupt():
+        while pending:
+            settle()
+        raise SendInterrupted()
+    
+    for phone, message, reason in entries:
+        if _shutting_down.is_set():
+            interrupt()
+        
+        future = None
+        if phone is not None and message is not None:
+            if not outbound_rate_limiter.acquire(cancel=_shutting_down):
+                interrupt()
+            future = executor.submit(send_sms, phone, message)
+            in_flight += 1
+        pending.append((phone, future, reason))
+        
+        # Hand finished results back in order and keep at most `window` sends queued
+        while pending and (pending[0][1] is None or pending[0][1].done() or in_flight >= window):
+            in_flight -= settle()
+    
+    while pending:
+        settle()
+    
+    return results
+
+# ---------------------------------------------------------------------------
+# Reply keywords
+#
+# Inbound replies are classified into an intent by normalising the message
+# (case, surrounding punctuation, repeated whitespace) and looking it up in one
+# keyword table. Only messages that aren't a keyword are searched for an email
+# address.
+# ---------------------------------------------------------------------------
+
+# language -> intent -> keywords. The English opt-out and opt-in words are the
+# standard carrier keywords, which Twilio also acts on before we see them.
+REPLY_KEYWORDS = {
+    'en': {
+        'consent': ['YES', 'Y', 'YEP', 'YEAH', 'SURE', 'OK', 'OKAY', 'START', 'UNSTOP'],
+        'opt_out': ['NO', 'N', 'NO THANKS', 'NO THANK YOU', 'STOP', 'STOPALL', 'STOP ALL', 'UNSUBSCRIBE', 'CANCEL', 'END', 'QUIT', 'REMOVE'],
+        'help': ['HELP', 'INFO'],
+    },
+    'fr': {
+        'consent': ['OUI', "D'ACCORD", 'DACCORD'],
+        'opt_out': ['NON', 'ARRET', 'ARRÊT', 'ARRETER', 'ARRÊTER', 'DESABONNER', 'DÉSABONNER'],
+        'help': ['AIDE'],
+    },
+    'es': {
+        'consent': ['SI', 'SÍ'],
+        'opt_out': ['ALTO', 'PARAR', 'CANCELAR'],
+        'help': ['AYUDA'],
+    },
+}
+# Languages whose keywords are recognised, e.g. "en,fr"
+KEYWORD_LANGUAGES = [lang.strip() for lang in os.getenv('KEYWORD_LANGUAGES', 'en,fr').split(',') if lang.strip()]
+# Extra keywords as JSON, e.g. {"consent": ["ABSOLUTELY"], "opt_out": ["LEAVE ME ALONE"]}
+KEYWORD_SYNONYMS = json.loads(os.getenv('KEYWORD_SYNONYMS', '{}'))
+
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+class KeywordEngine:
+    """
+    Classifies an inbound reply as 'consent', 'opt_out', 'help', 'email' or 'unknown'
+    classify() does one dict lookup on the normalised message, and one regex
+    search for an email address only when that misses
+    """
+    
+    # Whitespace and punctuation people wrap keywords in ("Yes!", " stop. ")
+    _TRIM_CHARS = ' \t\r\n!"#$%&\'()*,-./:;<=>?[\\]^_`{|}~¡¿…“”‘’«»'
+    
+    def __init__(self, keywords):
+        """keywords: intent -> iterable of keywords (any case or spacing)"""
+        self.table = {}
+        for intent, words in keywords.items():
+            for word in words:
+                self.table[self.normalize(word)] = intent
+    
+    @classmethod
+    def from_config(cls, languages=None, synonyms=None):
+        """Build the engine from REPLY_KEYWORDS for the given languages plus extra synonyms"""
+        keywords = {}
+        for lang in languages if languages is not None else KEYWORD_LANGUAGES:
+            for intent, words in REPLY_KEYWORDS.get(lang, {}).items():
+                keywords.setdefault(intent, []).extend(words)
+        for intent, words in (synonyms if synonyms is not None else KEYWORD_SYNONYMS).items():
+            keywords.setdefault(intent, []).extend(words)
+        return cls(keywords)
+    
+    @classmethod
+    def normalize(cls, text):
+        normalized = text.strip(cls._TRIM_CHARS).upper()
+        if '  ' in normalized or '\t' in normalized or '\n' in normalized:
+            normalized = ' '.join(normalized.split())
+        return normalized
+    
+    def classify(self, message_body):
+        """Return (intent, email), where email is only set for the 'email' intent"""
+        normalized = self.normalize(message_body)
+        intent = self.table.get(normalized)
+        if intent:
+            return intent, None
+        
+        # Handles both "EMAIL address@email.com" and a plain "address@email.com"
+        email_match = EMAIL_PATTERN.search(message_body) if '@' in message_body else None
+        if email_match:
+            return 'email', email_match.group()
+        if normalized.startswith('EMAIL'):
+            return 'email', None
+        return 'unknown', None
+
+keyword_engine = KeywordEngine.from_config()
+
+# ---------------------------------------------------------------------------
+# Participant cache
+#
+# Inbound messages look the sender up by canonical number. Known participants
+# are kept in a per-process LRU (warmed from the newest participants at
+# startup) so the lookup needs no database round trip. Writers in this process
+# update it as they go. Numbers that aren't participants are never cached, so
+# a participant added by another process is found on the next miss, and
+# updates are keyed on phone_e164 rather than a cached id, so a stale entry
+# can never touch the wrong row.
+# ---------------------------------------------------------------------------
+
+PARTICIPANT_CACHE_SIZE = int(os.getenv('PARTICIPANT_CACHE_SIZE', 50000))
+
+class ParticipantCache:
+    """Bounded LRU of phone_e164 -> {id, phone_number, consent_status, email}, with hit/miss counters"""
+    
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, phone_e164):
+        with self._lock:
+            entry = self._entries.get(phone_e164)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(phone_e164)
+            return entry
+    
+    def put(self, phone_e164, participant_id, phone_number, consent_status, email):
+        """Cache a participant and return its entry; the hit/miss counters are left alone"""
+        with self._lock:
+            return self._put(phone_e164, participant_id, phone_number, consent_status, email)
+    
+    def _put(self, phone_e164, participant_id, phone_number, consent_status, email):
+        entry = {
+            'id': participant_id,
+            'phone_number': phone_number,
+            'consent_status': consent_status,
+            'email': email,
+        }
+        self._entries[phone_e164] = entry
+        self._entries.move_to_end(phone_e164)
+        if len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return entry
+    
+    def load(self, rows):
+        """Add (phone_e164, id, phone_number, consent_status, email) rows, last row most recent"""
+        with self._lock:
+            for row in rows:
+                self._put(*row)
+    
+    def update(self, phone_e164, **changes):
+        """Write changed fields through to a cached participant (no-op if not cached)"""
+        with self._lock:
+            entry = self._entries.get(phone_e164)
+            if entry is not None:
+                self._entries[phone_e164] = dict(entry, **changes)
+    
+    def discard(self, phone_e164):
+        with self._lock:
+            self._entries.pop(phone_e164, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+participant_cache = ParticipantCache(PARTICIPANT_CACHE_SIZE)
 
-def process_sms_response(from_number, message_body):
-    """Process incoming SMS response"""
-    print(f"Processing response from {from_number}")
+PARTICIPANT_CACHE_COLUMNS = "phone_e164, id, phone_number, consent_status, email"
+
+def warm_participant_cache():
+    """Fill the cache with the most recently added participants"""
+    conn = get_db()
+    try:
+        rows = conn.execute(
+            f"""SELECT {PARTICIPANT_CACHE_COLUMNS} FROM participants
+                WHERE phone_e164 IS NOT NULL
+                ORDER BY id DESC LIMIT ?""",
+            (participant_cache.capacity,)
+        ).fetchall()
+    finally:
+        release_db(conn)
+    # Oldest first, so the newest participants end up most recently used
+    participant_cache.load(reversed(rows))
+    logger.info("Participant cache warmed with %d participants", len(rows))
+
+def lookup_participant(cursor, phone_e164):
+    """Return the cached participant for a number, reading it through from the database on a miss"""
+    entry = participant_cache.get(phone_e164)
+    if entry is not None:
+        return entry
+    cursor.execute(
+        f"SELECT {PARTICIPANT_CACHE_COLUMNS} FROM participants WHERE phone_e164 = ?",
+        (phone_e164,)
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    return participant_cache.put(*row)
+
+def process_sms_response(from_number, message_body, message_sid=None):
+    """
+    Process incoming SMS response
+    Returns the auto-reply text for the sender, or None if there is nothing to say
+    A message whose SID has already been processed is ignored (returns None).
+    Errors are rolled back and raised, so the caller can retry the message
+    """
+    logger.debug("Processing response from %s", from_number)
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = get_db()
     cursor = conn.cursor()
+    reply = None
     
     try:
         # Log the response
-        cursor.execute(
-            "INSERT INTO responses (phone_number, message_body) VALUES (?, ?)",
-            (from_number, message_body)
-        )
+        try:
+            cursor.execute(
+                "INSERT INTO responses (phone_number, message_body, message_sid) VALUES (?, ?, ?)",
+                (from_number, message_body, message_sid)
+            )
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            logger.info("Duplicate message %s from %s ignored", message_sid, from_number)
+            return None
         
         # Process the response
-        message_upper = message_body.strip().upper()
-        print(f"Processing message: '{message_upper}'")
+        intent, email = keyword_engine.classify(message_body)
+        logger.debug("Processing message: %r (intent %s)", message_body, intent)
         
-        # Check if the participant exists in the database with EXACT match
-        cursor.execute("SELECT phone_number FROM participants WHERE phone_number = ?", (from_number,))
-        participant = cursor.fetchone()
+        # Look the participant up by canonical number, whatever format the carrier used
+        phone_e164 = to_e164(from_number)
+        participant = lookup_participant(cursor, phone_e164)
         
-        if not participant:
-            print(f"Searching for alternative formats for number {from_number}")
-            # Try searching for the number without the '+' prefix
-            if from_number.startswith('+'):
-                alt_number = from_number[1:]  # Remove the '+' prefix
-                cursor.execute("SELECT phone_number FROM participants WHERE phone_number = ?", (alt_number,))
-                participant = cursor.fetchone()
-            
-            # Try searching with '+' prefix
-            if not participant and not from_number.startswith('+') and from_number.isdigit():
-                alt_number = '+' + from_number
-                cursor.execute("SELECT phone_number FROM participants WHERE phone_number = ?", (alt_number,))
-                participant = cursor.fetchone()
-                
-            # If we still can't find it, try removing the country code if it's there
-            if not participant and (from_number.startswith('+1') or from_number.startswith('1')):
-                if from_number.startswith('+1'):
-                    alt_number = from_number[2:]  # Remove the '+1' prefix
-                elif from_number.startswith('1'):
-                    alt_number = from_number[1:]  # Remove the '1' prefix
-                cursor.execute("SELECT phone_number FROM participants WHERE phone_number = ?", (alt_number,))
-                participant = cursor.fetchone()
-                
-            if not participant:
-                print(f"No participant found for number {from_number} after trying alternative formats")
-                # Send a message that we couldn't identify them
-                help_msg = "We couldn't identify your number in our system. Please text START to join our survey list."
-                send_sms(from_number, help_msg)
-                return
-        
-        # Get the actual phone number as stored in database
-        stored_number = participant[0]
-        print(f"Found participant with number: {stored_number}")
-        
-        if message_upper == "YES":
-            print(f"Processing YES response for {stored_number}")
-            # Update consent status
-            cursor.execute(
-                "UPDATE participants SET consent_status = 'consented', consent_timestamp = CURRENT_TIMESTAMP WHERE phone_number = ?",
-                (stored_number,)
-            )
-            rows_affected = cursor.rowcount
-            conn.commit()
-            print(f"Updated consent status, rows affected: {rows_affected}")
-            
-            # Send thank you message
-            thank_you_msg = "Thank you for consenting! You'll receive survey links occasionally. Reply STOP anytime to unsubscribe."
-            send_result = send_sms(from_number, thank_you_msg)
-            print(f"Sent thank you message: {send_result}")
-            
-        elif message_upper in ["NO", "STOP"]:
-            # Update consent status
-            cursor.execute(
-                "UPDATE participants SET consent_status = 'declined' WHERE phone_number = ?",
-                (stored_number,)
-            )
+        if not participant:
+            logger.info("No participant found for number %s", from_number)
             conn.commit()
+            return None
+        
+        # Get the actual phone number as stored in database
+        stored_number = participant['phone_number']
+        logger.debug("Found participant with number: %s", stored_number)
+        
+        # Column changes for this reply; consent_timestamp is set whenever consent is given
+        changes = None
+        if intent == 'consent':
+            logger.debug("Processing consent response for %s", stored_number)
+            changes = {'consent_status': 'consented'}
+            # Reply with thank you message
+            reply = "Thank you for consenting! You'll receive survey links occasionally. Reply STOP anytime to unsubscribe."
             
-            # Send opt-out confirmation
-            opt_out_msg = "You've been removed from our survey list. Thank you!"
-            send_sms(from_number, opt_out_msg)
-            print(f"Sent opt-out confirmation to {from_number}")
+        elif intent == 'opt_out':
+            changes = {'consent_status': 'declined'}
+            # Reply with opt-out confirmation
+            reply = "You've been removed from our survey list. Thank you!"
             
-        elif message_upper.startswith("EMAIL") or re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', message_body):
-            # Handle both "EMAIL address@email.com" and plain "address@email.com"
-            email_match = re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', message_body)
-            if email_match:
-                email = email_match.group()
+        elif intent == 'email':
+            # "EMAIL" without an address gets no reply
+            if email:
                 # Update both email AND consent status
-                cursor.execute(
-                    "UPDATE participants SET email = ?, consent_status = 'consented', consent_timestamp = CURRENT_TIMESTAMP WHERE phone_number = ?",
-                    (email, stored_number)
-                )
-                conn.commit()
-                
-                # Send confirmation for both email and SMS consent
-                email_msg = f"Thanks! We've saved your email: {email}. You're now signed up for email surveys. Reply STOP anytime to unsubscribe."
-                send_sms(from_number, email_msg)
-                print(f"Sent email and consent confirmation to {from_number}")
+                changes = {'email': email, 'consent_status': 'consented'}
+                # Reply with confirmation for both email and SMS consent
+                reply = f"Thanks! We've saved your email: {email}. You're now signed up for email surveys. Reply STOP anytime to unsubscribe."
         else:
-            # Handle unknown responses
-            help_msg = "Reply YES to consent to SMS surveys, NO to opt out, or provide your email address to sign up for both SMS and email surveys."
-            send_sms(from_number, help_msg)
-            print(f"Sent help message to {from_number}")
+            # HELP and unknown responses both get the instructions
+            reply = "Reply YES to consent to SMS surveys, NO to opt out, or provide your email address to sign up for both SMS and email surveys."
+        
+        if changes:
+            assignments = [f"{column} = ?" for column in changes]
+            if changes['consent_status'] == 'consented':
+                assignments.append("consent_timestamp = CURRENT_TIMESTAMP")
+            cursor.execute(
+                f"UPDATE participants SET {', '.join(assignments)} WHERE phone_e164 = ?",
+                list(changes.values()) + [phone_e164]
+            )
+            if cursor.rowcount:
+                bump_data_version(cursor, 'participants')
+                conn.commit()
+                participant_cache.update(phone_e164, **changes)
+                logger.debug("Updated participant %s: %s", stored_number, changes)
+            else:
+                # Deleted by another process since it was cached
+                participant_cache.discard(phone_e164)
+                logger.info("Participant %s no longer exists", stored_number)
+                reply = None
         
         conn.commit()
-    except Exception as e:
-        print(f"Error processing response: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        conn.rollback()
+        raise
     finally:
-        conn.close()
+        release_db(conn)
+    
+    return reply
 
 def normalize_phone_number(phone):
     """
@@ -220,7 +1173,24 @@ def normalize_phone_number(phone):
         # Return as is if we can't normalize it
         return phone
 
-def send_consent_request(phone_numbers):
+def to_e164(phone):
+    """
+    Canonical E.164 form of a phone number (e.g. +16135551234)
+    Used as the lookup key for participants regardless of how the carrier formats it
+    """
+    if not phone:
+        return None
+    
+    digits = re.sub(r'\D', '', phone)
+    if not digits:
+        return None
+    
+    # Bare 10-digit numbers are North American numbers without the country code
+    if len(digits) == 10 and not phone.strip().startswith('+'):
+        return "+1" + digits
+    return "+" + digits
+
+def send_consent_request(phone_numbers, progress=None):
     """Send consent request to list of phone numbers"""
     consent_message = (
         "Hi! This is Pallas Data. You previously expressed interest in participating in our surveys. "
@@ -230,33 +1200,21 @@ def send_consent_request(phone_numbers):
         "Thanks!"
     )
     
-    results = {"success": [], "failed": []}
-    
-    for phone in phone_numbers:
-        # Clean phone number
-        phone = phone.strip()
-        if not phone:
-            continue
-            
-        # Validate phone number format
-        if not is_valid_phone_number(phone):
-            results["failed"].append({"phone": phone, "reason": "Invalid phone number format"})
-            continue
-        
-        # Note: We don't need to add to database here anymore since it's already handled
-        # by store_participants_with_data function when processing CSV
-        
-        # Send SMS
-        if send_sms(phone, consent_message):
-            results["success"].append(phone)
-        else:
-            results["failed"].append({"phone": phone, "reason": "Failed to send SMS"})
-        
-        # Add small delay for rate limiting
-        import time
-        time.sleep(1)
+    def entries():
+        for phone in phone_numbers:
+            # Clean phone number
+            phone = phone.strip()
+            if not phone:
+                yield None, None, None
+            # Validate phone number format
+            elif not is_valid_phone_number(phone):
+                yield phone, None, "Invalid phone number format"
+            else:
+                # Note: We don't need to add to database here anymore since it's already handled
+                # by store_participants_with_data function when processing CSV
+                yield phone, consent_message, None
     
-    return results
+    return dispatch_messages(entries(), 'consent', progress)
 
 def is_valid_phone_number(phone):
     """
@@ -285,219 +1243,358 @@ def is_valid_phone_number(phone):
     # Default to False for anything else
     return False
 
-def send_survey_link(survey_url, custom_message=None):
-    """Send survey link to consented participants"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+# Upload responses echo back only this many parsed rows and failure details
+CSV_PREVIEW_LIMIT = 20
+CSV_FAILURE_DETAIL_LIMIT = 100
+
+class UploadStreamReader(io.RawIOBase):
+    """
+    Raw binary view of a file-like object that only has read()
+    Before Python 3.11 SpooledTemporaryFile (werkzeug's upload buffer) has no
+    readable(), so TextIOWrapper can't wrap it directly
+    """
     
-    # Get consented participants who haven't been sent this survey
-    cursor.execute(
-        "SELECT phone_number FROM participants WHERE consent_status = 'consented' AND survey_sent = 0"
-    )
-    participants = cursor.fetchall()
-    conn.close()
+    def __init__(self, stream):
+        self._stream = stream
     
-    if not participants:
-        print("No consented participants to send survey to.")
-        return
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+def open_csv_text(source):
+    """Wrap an upload stream (or bytes/str) in an incrementally decoded text stream"""
+    if isinstance(source, str):
+        return io.StringIO(source)
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    elif not isinstance(source, io.IOBase):
+        source = io.BufferedReader(UploadStreamReader(source))
+    return io.TextIOWrapper(source, encoding='utf-8', newline='')
+
+# Header keywords that identify a phone number column
+PHONE_COLUMN_KEYWORDS = ['phone', 'mobile', 'cell', 'contact', 'number', 'tel']
+
+# Mapping from database columns to the CSV header variations we accept for them
+CSV_COLUMN_MAPPING = {
+    'calltime': ['calltime', 'call_time', 'call time'],
+    'last_fed_vote_intent': ['lastfedvoteintent', 'last_fed_vote_intent', 'vote_intent', 'voting_intent'],
+    'gender': ['gender'],
+    'age': ['age'],
+    'education': ['education'],
+    'phone_type': ['phonetype', 'phone_type', 'phone type'],
+    'region': ['region'],
+    'notes': ['notes', 'note', 'comments']
+}
+
+EMPTY_CSV_VALUES = {'', 'null', 'none', 'n/a'}
+
+class CsvPlan:
+    """
+    Header-to-column mapping resolved once per upload
+    phone_indexes lists every column that looks like a phone number column;
+    fields maps each database column to the candidate column indexes to read,
+    in order of preference.
+    """
     
-    message = custom_message or f"Hi! Here's your survey link: {survey_url} Thank you for participating!"
+    def __init__(self, headers, phone_indexes, fields):
+        self.headers = headers
+        self.phone_indexes = phone_indexes
+        self.fields = fields
+
+def compile_csv_plan(headers):
+    """Resolve CSV headers into direct column-index lookups"""
+    lowered = [header.lower() for header in headers]
     
-    for (phone,) in participants:
-        if send_sms(phone, message):
-            # Mark as survey sent
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE participants SET survey_sent = 1 WHERE phone_number = ?",
-                (phone,)
-            )
-            conn.commit()
-            conn.close()
-        
-        import time
-        time.sleep(1)  # Rate limiting
+    phone_indexes = []
+    for i, header in enumerate(lowered):
+        header = header.strip()
+        if header == 'phone_number' or any(keyword in header for keyword in PHONE_COLUMN_KEYWORDS):
+            phone_indexes.append(i)
+    
+    fields = []
+    for db_column, csv_variations in CSV_COLUMN_MAPPING.items():
+        candidates = []
+        for csv_col in csv_variations:
+            # Exact header match first, then case-insensitive
+            for i in [i for i, header in enumerate(headers) if header == csv_col] + \
+                     [i for i, header in enumerate(lowered) if header == csv_col.lower()]:
+                if i not in candidates:
+                    candidates.append(i)
+        if candidates:
+            fields.append((db_column, candidates))
+    
+    return CsvPlan(headers, phone_indexes, fields)
 
-def process_csv_file(file_content):
-    """Process CSV file content and extract phone numbers with additional data"""
-    try:
-        # Try to decode the file content as UTF-8
-        if isinstance(file_content, bytes):
-            file_content = file_content.decode('utf-8')
-        
-        print("CSV DEBUGGING: File content decoded successfully")
+def iter_csv_participants(reader, headers, stats):
+    """Validate and normalize rows from a csv.reader, yielding participant dicts"""
+    logger.debug("CSV columns: %s", headers)
+    
+    plan = compile_csv_plan(headers)
+    
+    if plan.phone_indexes:
+        phone_index = plan.phone_indexes[0]
+        logger.debug("CSV phone column: %r", headers[phone_index])
+    else:
+        # Use first column as default
+        phone_index = 0
+        logger.debug("CSV has no phone-like header, using first column %r", headers[0])
+    
+    fields = plan.fields
+    
+    for row_idx, row in enumerate(reader):
+        stats["rows"] += 1
+        width = len(row)
+        phone_value = row[phone_index].strip() if phone_index < width else ''
+        
+        if not phone_value or not is_valid_phone_number(phone_value):
+            logger.debug("CSV row %d: invalid phone number %r", row_idx, phone_value, extra=SAMPLED)
+            stats["invalid"] += 1
+            continue
         
-        # Use StringIO to create a file-like object
-        csv_file = io.StringIO(file_content)
+        normalized_phone = normalize_phone_number(phone_value)
+        logger.debug("CSV row %d: valid phone number %r", row_idx, normalized_phone, extra=SAMPLED)
         
-        # Try to read the CSV file
-        reader = csv.DictReader(csv_file)
+        # Extract additional data
+        participant_data = {'phone_number': normalized_phone}
         
-        # Get all rows
-        rows = list(reader)
+        for db_column, candidates in fields:
+            for i in candidates:
+                if i < width:
+                    value = row[i].strip()
+                    if value:
+                        if value.lower() not in EMPTY_CSV_VALUES:
+                            participant_data[db_column] = value
+                        break
         
-        print(f"CSV DEBUGGING: CSV has {len(rows)} rows")
+        stats["valid"] += 1
+        yield participant_data
+
+def last_participant_id():
+    """Highest participant id so far; ids only grow (AUTOINCREMENT)"""
+    conn = get_db()
+    try:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM participants").fetchone()[0]
+    finally:
+        release_db(conn)
+
+def count_import_results(upload_id, last_id):
+    """(participants tagged with the upload, how many of them are new) after an import"""
+    conn = get_db()
+    try:
+        unique, inserted = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(id > ?), 0) FROM participants WHERE upload_id = ?",
+            (last_id, upload_id)
+        ).fetchone()
+    finally:
+        release_db(conn)
+    return unique, inserted
+
+def process_csv_file(csv_source, upload_id=None):
+    """
+    Stream a participants CSV into the database
+    Rows are decoded, validated and upserted in chunks as they are read, so
+    memory use doesn't grow with the file. Returns counts and a short preview:
+    total is the number of distinct participants in the file (inserted plus
+    updated); duplicate_rows counts rows that repeated a number.
+    """
+    try:
+        reader = csv.reader(open_csv_text(csv_source))
+        headers = next(reader, None)
         
-        if not rows:
+        if not headers:
             return {"status": "error", "message": "CSV file is empty"}
         
-        # Get column names from the CSV
-        fieldnames = reader.fieldnames
-        print(f"CSV DEBUGGING: Available columns: {fieldnames}")
-        
-        # Look for phone number column
-        phone_column = None
-        for field in fieldnames:
-            field_lower = field.lower().strip()
-            if field_lower == 'phone_number' or any(keyword in field_lower for keyword in ['phone', 'mobile', 'cell', 'contact', 'number', 'tel']):
-                phone_column = field
-                print(f"CSV DEBUGGING: Found phone column: '{field}'")
-                break
-        
-        if not phone_column:
-            # Use first column as default
-            phone_column = fieldnames[0]
-            print(f"CSV DEBUGGING: Using first column as phone column: '{phone_column}'")
-        
-        # Process each row
-        processed_data = []
-        valid_phones_found = 0
-        invalid_phones_found = 0
-        
-        # Create mapping from CSV columns to database columns
-        column_mapping = {
-            'calltime': ['calltime', 'call_time', 'call time'],
-            'last_fed_vote_intent': ['lastfedvoteintent', 'last_fed_vote_intent', 'vote_intent', 'voting_intent'],
-            'gender': ['gender'],
-            'age': ['age'],
-            'education': ['education'],
-            'phone_type': ['phonetype', 'phone_type', 'phone type'],
-            'region': ['region'],
-            'notes': ['notes', 'note', 'comments']
-        }
+        stats = {"rows": 0, "valid": 0, "invalid": 0, "error": None}
+        preview = []
+        upload_id = upload_id or uuid.uuid4().hex
+        last_id = last_participant_id()
         
-        for row_idx, row in enumerate(rows):
-            phone_value = str(row.get(phone_column, '')).strip()
-            
-            if not phone_value or not is_valid_phone_number(phone_value):
-                print(f"CSV DEBUGGING: Row {row_idx}: Invalid phone number '{phone_value}'")
-                invalid_phones_found += 1
-                continue
-            
-            normalized_phone = normalize_phone_number(phone_value)
-            print(f"CSV DEBUGGING: Row {row_idx}: Valid phone number '{normalized_phone}'")
-            
-            # Extract additional data
-            participant_data = {'phone_number': normalized_phone}
-            
-            # Map CSV columns to database columns
-            for db_column, csv_variations in column_mapping.items():
-                value = None
-                for csv_col in csv_variations:
-                    # Try exact match first
-                    if csv_col in row:
-                        value = str(row[csv_col]).strip()
-                        break
-                    # Try case-insensitive match
-                    for actual_col in fieldnames:
-                        if actual_col.lower() == csv_col.lower():
-                            value = str(row[actual_col]).strip()
-                            break
-                    if value:
-                        break
-                
-                if value and value.lower() not in ['', 'null', 'none', 'n/a']:
-                    participant_data[db_column] = value
-            
-            processed_data.append(participant_data)
-            valid_phones_found += 1
+        def participants():
+            try:
+                for participant in iter_csv_participants(reader, headers, stats):
+                    if len(preview) < CSV_PREVIEW_LIMIT:
+                        preview.append(dict(participant))
+                    participant['upload_id'] = upload_id
+                    yield participant
+            except Exception as e:
+                # Stop the import at the bad row; earlier chunks are already stored
+                stats["error"] = e
+        
+        store_results = store_participants_with_data(participants(), collect_phones=False)
+        
+        if stats["error"] is not None:
+            # Rows read before the error are committed; say how many, and under which upload
+            logger.error("CSV import stopped after %d rows: %s", stats["rows"], stats["error"])
+            return {
+                "status": "error",
+                "message": (
+                    f"Error processing CSV after {stats['rows']} rows: {stats['error']}. "
+                    f"{store_results['stored']} rows read before the error were stored"
+                ),
+                "rows_read": stats["rows"],
+                "stored_successfully": store_results["stored"]
+            }
         
-        print(f"CSV DEBUGGING: Found {valid_phones_found} valid and {invalid_phones_found} invalid phone numbers")
+        if not stats["rows"]:
+            return {"status": "error", "message": "CSV file is empty"}
         
-        # Remove duplicates while preserving order
-        unique_data = []
-        seen_phones = set()
-        for data in processed_data:
-            phone = data['phone_number']
-            if phone not in seen_phones:
-                seen_phones.add(phone)
-                unique_data.append(data)
+        logger.info("CSV import found %d valid and %d invalid phone numbers", stats["valid"], stats["invalid"])
         
-        print(f"CSV DEBUGGING: Returning {len(unique_data)} unique participants with data")
+        # Repeated numbers are upserted once per row but are one participant
+        unique, inserted = count_import_results(upload_id, last_id)
         
         return {
-            "status": "success", 
-            "participants_data": unique_data,
-            "total": len(unique_data)
+            "status": "success",
+            "total": unique,
+            "inserted": inserted,
+            "updated": unique - inserted,
+            "duplicate_rows": store_results["stored"] - unique,
+            "invalid_rows": stats["invalid"],
+            "stored_successfully": store_results["stored"],
+            "storage_failures": len(store_results["failed"]),
+            "storage_failures_detail": store_results["failed"][:CSV_FAILURE_DETAIL_LIMIT],
+            "preview": preview
         }
     
     except Exception as e:
-        print(f"CSV DEBUGGING ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error processing CSV: %s", e)
         return {"status": "error", "message": f"Error processing CSV: {str(e)}"}
 
-def store_participants_with_data(participants_data):
-    """Store participants with their additional data in the database"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+# Optional participant columns that can be imported from a CSV
+PARTICIPANT_DATA_FIELDS = ['calltime', 'last_fed_vote_intent', 'gender', 'age', 'education', 'phone_type', 'region', 'notes']
+
+# Columns an import may set (data fields plus the tag of the upload they came from)
+PARTICIPANT_IMPORT_FIELDS = PARTICIPANT_DATA_FIELDS + ['upload_id']
+
+# Rows written per transaction when importing participants
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', 5000))
+
+_upsert_sql_cache = {}
+
+def participant_upsert_sql(fields):
+    """Build (and cache) the upsert statement for one set of optional columns"""
+    sql = _upsert_sql_cache.get(fields)
+    if sql is None:
+        columns = ['phone_number', 'phone_e164'] + list(fields)
+        sql = f"""
+            INSERT INTO participants ({', '.join(columns)})
+            VALUES ({', '.join('?' for _ in columns)})
+            ON CONFLICT(phone_e164) DO
+        """
+        if fields:
+            sql += "UPDATE SET " + ", ".join(f"{field} = excluded.{field}" for field in fields)
+        else:
+            sql += "NOTHING"
+        _upsert_sql_cache[fields] = sql
+    return sql
+
+def store_participants_with_data(participants_data, chunk_size=IMPORT_CHUNK_SIZE, collect_phones=True):
+    """
+    Store participants with their additional data in the database
+    Existing participants are updated in place, so consent status, email and
+    survey state survive a re-import. participants_data can be any iterable;
+    pass collect_phones=False to report only a count of stored rows.
+    """
+    conn = get_db()
     
-    results = {"success": [], "failed": []}
+    results = {"success": [], "failed": [], "stored": 0}
+    if not collect_phones:
+        results["success"] = None
     
     try:
+        chunk = []
         for participant in participants_data:
-            phone = participant['phone_number']
-            
-            # Prepare the update/insert query
-            columns = ['phone_number']
-            values = [phone]
-            placeholders = ['?']
-            
-            # Add additional columns if they exist
-            additional_fields = ['calltime', 'last_fed_vote_intent', 'gender', 'age', 'education', 'phone_type', 'region', 'notes']
-            
-            for field in additional_fields:
-                if field in participant and participant[field]:
-                    columns.append(field)
-                    values.append(participant[field])
-                    placeholders.append('?')
-            
-            # Create the INSERT OR REPLACE query
-            query = f"""
-                INSERT OR REPLACE INTO participants 
-                ({', '.join(columns)}, created_at) 
-                VALUES ({', '.join(placeholders)}, COALESCE(
-                    (SELECT created_at FROM participants WHERE phone_number = ?),
-                    CURRENT_TIMESTAMP
-                ))
-            """
-            
-            try:
-                cursor.execute(query, values + [phone])
-                results["success"].append(phone)
-                print(f"Successfully stored participant: {phone}")
-            except Exception as e:
-                results["failed"].append({"phone": phone, "reason": f"Database error: {str(e)}"})
-                print(f"Failed to store participant {phone}: {str(e)}")
+            chunk.append(participant)
+            if len(chunk) >= chunk_size:
+                upsert_participant_chunk(conn, chunk, results)
+                chunk = []
+        if chunk:
+            upsert_participant_chunk(conn, chunk, results)
         
-        conn.commit()
+        logger.info("Stored %d participants (%d failed)", results["stored"], len(results["failed"]))
         
     except Exception as e:
-        print(f"Error in store_participants_with_data: {str(e)}")
+        logger.exception("Error in store_participants_with_data: %s", e)
         results["failed"].append({"phone": "unknown", "reason": f"General error: {str(e)}"})
     finally:
-        conn.close()
+        release_db(conn)
     
     return results
 
-def search_participants(filters=None):
+def upsert_participant_chunk(conn, chunk, results):
+    """Upsert one chunk of participants in a single transaction"""
+    # Consecutive rows that carry the same columns share one executemany.
+    # Runs stay in file order, so a number listed twice ends up with the
+    # later row's values, as it would across chunks
+    groups = []
+    for participant in chunk:
+        phone = participant['phone_number']
+        fields = tuple(field for field in PARTICIPANT_IMPORT_FIELDS if participant.get(field))
+        row = (phone, to_e164(phone)) + tuple(participant[field] for field in fields)
+        if groups and groups[-1][0] == fields:
+            groups[-1][1].append(row)
+        else:
+            groups.append((fields, [row]))
+    
+    try:
+        with conn:
+            for fields, rows in groups:
+                conn.executemany(participant_upsert_sql(fields), rows)
+            bump_data_version(conn, 'participants')
+        for fields, rows in groups:
+            results["stored"] += len(rows)
+            if results["success"] is not None:
+                results["success"].extend(row[0] for row in rows)
+        cache_participants(conn, [row[1] for fields, rows in groups for row in rows])
+        return
+    except sqlite3.Error as e:
+        logger.warning("Bulk upsert failed (%s), retrying chunk row by row", e)
+    
+    # Retry individually so one bad row doesn't fail the whole chunk
+    stored = []
+    for fields, rows in groups:
+        sql = participant_upsert_sql(fields)
+        for row in rows:
+            try:
+                with conn:
+                    conn.execute(sql, row)
+                    bump_data_version(conn, 'participants')
+                results["stored"] += 1
+                if results["success"] is not None:
+                    results["success"].append(row[0])
+                stored.append(row[1])
+            except sqlite3.Error as e:
+                results["failed"].append({"phone": row[0], "reason": f"Database error: {str(e)}"})
+                logger.warning("Failed to store participant %s: %s", row[0], e)
+    cache_participants(conn, stored)
+
+# Numbers per lookup when writing imported participants through to the cache
+PARTICIPANT_CACHE_FETCH_SIZE = 500
+
+def cache_participants(conn, phones_e164):
     """
-    Search participants based on various filters
-    Returns participants matching the criteria
+    Write just-imported participants through to the participant cache
+    They are about to be sent a consent request, so their replies should hit
+    """
+    phones_e164 = phones_e164[-participant_cache.capacity:]
+    for start in range(0, len(phones_e164), PARTICIPANT_CACHE_FETCH_SIZE):
+        batch = phones_e164[start:start + PARTICIPANT_CACHE_FETCH_SIZE]
+        participant_cache.load(conn.execute(
+            f"SELECT {PARTICIPANT_CACHE_COLUMNS} FROM participants "
+            f"WHERE phone_e164 IN ({','.join('?' * len(batch))})",
+            batch
+        ))
+
+def build_participant_search(filters=None):
+    """
+    Build the SQL and parameters for search_participants
+    Every supported filter is written so it can be answered from one of the
+    participant segment indexes created in init_database
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
     # Base query - only consented participants
     base_query = """
         SELECT phone_number, consent_status, email, calltime, last_fed_vote_intent, 
@@ -512,41 +1609,44 @@ def search_participants(filters=None):
     if filters:
         # Gender filter
         if filters.get('gender'):
-            conditions.append("LOWER(gender) = LOWER(?)")
+            conditions.append("gender = ? COLLATE NOCASE")
             params.append(filters['gender'])
         
-        # Age filter (can be range or specific)
+        # Age filter (can be range or specific); ranges use the integer age_num column
         if filters.get('age_min'):
-            # Handle age as number for range queries
-            conditions.append("CAST(age AS INTEGER) >= ?")
+            conditions.append("age_num >= ?")
             params.append(int(filters['age_min']))
         
         if filters.get('age_max'):
-            conditions.append("CAST(age AS INTEGER) <= ?")
+            conditions.append("age_num <= ?")
             params.append(int(filters['age_max']))
         
         if filters.get('age_exact'):
-            conditions.append("age = ?")
-            params.append(filters['age_exact'])
+            if str(filters['age_exact']).strip().isdigit():
+                conditions.append("age_num = ?")
+                params.append(int(filters['age_exact']))
+            else:
+                conditions.append("age = ?")
+                params.append(filters['age_exact'])
         
-        # Region filter
+        # Region filter (substring match; LIKE is already case-insensitive)
         if filters.get('region'):
-            conditions.append("LOWER(region) LIKE LOWER(?)")
+            conditions.append("region LIKE ?")
             params.append(f"%{filters['region']}%")
         
         # Education filter
         if filters.get('education'):
-            conditions.append("LOWER(education) LIKE LOWER(?)")
+            conditions.append("education LIKE ?")
             params.append(f"%{filters['education']}%")
         
         # Phone type filter
         if filters.get('phone_type'):
-            conditions.append("LOWER(phone_type) = LOWER(?)")
+            conditions.append("phone_type = ? COLLATE NOCASE")
             params.append(filters['phone_type'])
         
         # Vote intent filter
         if filters.get('vote_intent'):
-            conditions.append("LOWER(last_fed_vote_intent) LIKE LOWER(?)")
+            conditions.append("last_fed_vote_intent LIKE ?")
             params.append(f"%{filters['vote_intent']}%")
         
         # Email filter (has email or not)
@@ -577,8 +1677,18 @@ def search_participants(filters=None):
         query = base_query
     
     query += " ORDER BY created_at DESC"
+    return query, params
+
+def search_participants(filters=None):
+    """
+    Search participants based on various filters
+    Returns participants matching the criteria
+    """
+    conn = get_db()
+    cursor = conn.cursor()
     
     try:
+        query, params = build_participant_search(filters)
         cursor.execute(query, params)
         rows = cursor.fetchall()
         
@@ -600,7 +1710,7 @@ def search_participants(filters=None):
         }
         
     except Exception as e:
-        print(f"Error searching participants: {e}")
+        logger.exception("Error searching participants: %s", e)
         return {
             "status": "error",
             "message": str(e),
@@ -608,140 +1718,690 @@ def search_participants(filters=None):
             "count": 0
         }
     finally:
-        conn.close()
+        release_db(conn)
 
-def send_targeted_survey(survey_url, phone_numbers, custom_message=None):
-    """Send survey link to specific phone numbers"""
-    if not phone_numbers:
-        return {"status": "error", "message": "No phone numbers provided"}
+# Full-text search
+TEXT_SEARCH_PAGE_SIZE = 20
+TEXT_SEARCH_MAX_PAGE_SIZE = 200
+
+TEXT_SEARCH_SCOPES = {
+    # scope -> (fts table, source table, columns returned alongside the snippet)
+    'responses': ('responses_fts', 'responses', ['id', 'phone_number', 'timestamp']),
+    'participants': ('participants_fts', 'participants', ['id', 'phone_number', 'consent_status', 'created_at']),
+}
+
+def build_fts_query(text):
+    """
+    Turn free text into an FTS5 query matching all of its words
+    Each word is quoted so punctuation can't be read as query syntax; a
+    trailing * keeps its prefix-match meaning
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*')
+        if not word:
+            continue
+        terms.append('"' + word.replace('"', '""') + '"' + ('*' if prefix else ''))
+    return " ".join(terms)
+
+def search_text(text, scope='responses', limit=TEXT_SEARCH_PAGE_SIZE, offset=0, raw=False):
+    """
+    Ranked full-text search over inbound messages or participant notes
+    Returns the best matches first (bm25) with a highlighted snippet for each
+    """
+    if not FULL_TEXT_SEARCH_AVAILABLE:
+        raise RuntimeError("Full-text search is not available in this SQLite build")
     
-    # Format the message properly - ALWAYS include the survey URL
-    if custom_message:
-        # If custom message provided, append the survey URL
-        message = f"{custom_message.strip()} {survey_url}"
-    else:
-        # Default message with survey URL
-        message = f"Hi! Here's your survey link: {survey_url} Thank you for participating!"
+    fts_table, table, columns = TEXT_SEARCH_SCOPES[scope]
+    match = text if raw else build_fts_query(text)
+    if not match:
+        raise ValueError("Search text is empty")
     
-    results = {"success": [], "failed": []}
+    conn = get_db()
+    try:
+        select_columns = ", ".join(f"t.{column}" for column in columns)
+        cursor = conn.execute(f"""
+            SELECT {select_columns},
+                   snippet({fts_table}, 0, '[', ']', '...', 12),
+                   bm25({fts_table})
+            FROM {fts_table}
+            JOIN {table} t ON t.id = {fts_table}.rowid
+            WHERE {fts_table} MATCH ?
+            ORDER BY bm25({fts_table})
+            LIMIT ? OFFSET ?
+        """, (match, limit + 1, offset))
+        rows = cursor.fetchall()
+    except sqlite3.OperationalError as e:
+        # Malformed raw queries surface here as FTS5 syntax errors
+        raise ValueError(f"Invalid search query: {e}")
+    finally:
+        release_db(conn)
     
-    for phone in phone_numbers:
-        if send_sms(phone, message):
-            results["success"].append(phone)
-            
-            # Mark as survey sent
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            try:
-                cursor.execute(
-                    "UPDATE participants SET survey_sent = 1 WHERE phone_number = ?",
-                    (phone,)
+    has_more = len(rows) > limit
+    results = []
+    for row in rows[:limit]:
+        result = dict(zip(columns, row))
+        result['snippet'] = row[-2]
+        result['rank'] = row[-1]
+        results.append(result)
+    
+    return {
+        "results": results,
+        "next_offset": offset + limit if has_more else None
+    }
+
+# Work leases
+#
+# Outbound work (send jobs and campaign recipients) is claimed by writing a
+# lease owner and expiry onto the row in the same statement that selects it,
+# so two processes can never claim the same row. The owning process renews
+# its leases from a heartbeat thread; if it dies, the lease runs out and the
+# row can be claimed again.
+LEASE_SECONDS = float(os.getenv('LEASE_SECONDS', 60))
+LEASE_HEARTBEAT_INTERVAL = LEASE_SECONDS / 3
+
+def make_worker_id():
+    """Identity written into leases taken by this process"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+WORKER_ID = make_worker_id()
+
+# Lease owner tokens for campaign sends currently running in this process
+_active_recipient_leases = set()
+_active_recipient_leases_lock = threading.Lock()
+
+def lease_expiry():
+    return time.time() + LEASE_SECONDS
+
+# Buffered status writes: campaign deliveries are flushed in chunks of
+# SURVEY_STATUS_BATCH_SIZE rows or every SURVEY_STATUS_FLUSH_MS milliseconds
+SURVEY_STATUS_BATCH_SIZE = int(os.getenv('SURVEY_STATUS_BATCH_SIZE', 100))
+SURVEY_STATUS_FLUSH_MS = int(os.getenv('SURVEY_STATUS_FLUSH_MS', 500))
+SURVEY_SEND_LOG_PATH = os.getenv('SURVEY_SEND_LOG_PATH', 'survey_send.log')
+
+class BatchWriter:
+    """
+    Buffer rows and write them with executemany, one transaction per chunk.
+    
+    If log_path is set, each row is appended to that file as it arrives and
+    the file is truncated once the chunk is committed. A crash therefore
+    loses at most the unflushed chunk, and replay() applies it on restart.
+    
+    With flush_in_background, add() never touches the database: full chunks
+    are handed to the flusher thread, and without a log the write happens
+    outside the buffer lock, so callers only ever wait for a list append.
+    """
+    
+    def __init__(self, name, write_rows, batch_size, flush_interval_ms, log_path=None,
+                 flush_in_background=False):
+        self.name = name
+        self.write_rows = write_rows
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.log_path = log_path
+        self.flush_in_background = flush_in_background
+        self.buffer = []
+        self.lock = threading.RLock()
+        self.write_lock = threading.Lock()
+        self.log_file = None
+        self.flusher = None
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+    
+    def add(self, row):
+        """Buffer a row, flushing if the chunk is full"""
+        with self.lock:
+            if self.log_path:
+                if self.log_file is None:
+                    self.log_file = open(self.log_path, 'a', buffering=1)
+                self.log_file.write(json.dumps(row) + "\n")
+            self.buffer.append(row)
+            if self.flusher is None:
+                self.flusher = threading.Thread(
+                    target=self._flush_periodically, name=f"{self.name}-flusher", daemon=True
                 )
-                conn.commit()
-            except Exception as e:
-                print(f"Error updating survey_sent status for {phone}: {e}")
-            finally:
-                conn.close()
-        else:
-            results["failed"].append({"phone": phone, "reason": "Failed to send SMS"})
+                self.flusher.start()
+            if len(self.buffer) >= self.batch_size:
+                if self.flush_in_background:
+                    self.wakeup.set()
+                else:
+                    self.flush()
+    
+    def flush(self):
+        """Write all buffered rows in a single transaction"""
+        with self.lock:
+            if not self.buffer:
+                return
+            rows = self.buffer
+            self.buffer = []
+            if self.log_path:
+                # The log can only be truncated once its rows are committed, so
+                # appends wait for the write
+                if not self._write(rows):
+                    # Keep the rows (and the log) so the next flush or a restart retries them
+                    self.buffer = rows + self.buffer
+                    return
+                if self.log_file is not None:
+                    self.log_file.truncate(0)
+                return
         
-        import time
-        time.sleep(1)  # Rate limiting
+        with self.write_lock:
+            if not self._write(rows):
+                with self.lock:
+                    self.buffer = rows + self.buffer
+    
+    def _write(self, rows):
+        conn = get_db()
+        try:
+            with conn:
+                self.write_rows(conn.cursor(), rows)
+            return True
+        except Exception as e:
+            logger.error("Error flushing %d rows from %s: %s", len(rows), self.name, e)
+            return False
+    
+    def _flush_periodically(self):
+        while not self.stopping.is_set():
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+    
+    def replay(self, path=None):
+        """
+        Apply rows left in a log (this writer's by default) by a previous process, then delete it
+        This writer's own log is skipped once it has started appending to it
+        """
+        path = path or self.log_path
+        
+        with self.lock:
+            if path == self.log_path and self.log_file is not None:
+                return 0
+            if not path:
+                return 0
+            try:
+                with open(path) as f:
+                    rows = [json.loads(line) for line in f if line.strip()]
+            except FileNotFoundError:
+                # Absent, or another worker replayed it first
+                return 0
+            if rows:
+                if not self._write(rows):
+                    return 0
+                logger.info("Reconciled %d rows from %s", len(rows), path)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return len(rows)
+    
+    def reset_after_fork(self, log_path=None):
+        """
+        Give a forked child its own writer state
+        Rows buffered by the parent stay with the parent, and the child's
+        flusher thread is started again on its first add()
+        """
+        self.buffer = []
+        self.lock = threading.RLock()
+        self.write_lock = threading.Lock()
+        self.log_file = None
+        self.flusher = None
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        if log_path:
+            self.log_path = log_path
+    
+    def close(self):
+        """Flush what's left, stop the background flusher and remove the log if it's empty"""
+        self.stopping.set()
+        self.wakeup.set()
+        self.flush()
+        with self.lock:
+            if self.log_file is not None:
+                self.log_file.close()
+                self.log_file = None
+                if not self.buffer:
+                    os.remove(self.log_path)
+
+def write_campaign_deliveries(cursor, rows):
+    """
+    Record [campaign_id, phone, status, message_sid] rows in campaign_recipients
+    Successful sends also set the participant's survey_sent flag, which the
+    search filters still use. Older send logs may hold rows without the SID,
+    or just [phone] from before campaigns existed; those only set the flag.
+    """
+    deliveries = [(list(row) + [None])[:4] for row in rows if len(row) >= 3]
+    cursor.executemany('''
+        INSERT INTO campaign_recipients (campaign_id, participant_id, status, message_sid, sent_at)
+        SELECT ?, id, ?, ?, CASE WHEN ? = 'sent' THEN CURRENT_TIMESTAMP END
+        FROM participants WHERE phone_number = ?
+        ON CONFLICT(campaign_id, participant_id) DO UPDATE SET
+            status = excluded.status,
+            message_sid = COALESCE(excluded.message_sid, message_sid),
+            sent_at = COALESCE(excluded.sent_at, sent_at),
+            lease_owner = NULL,
+            lease_expires_at = NULL,
+            updated_at = CURRENT_TIMESTAMP
+    ''', [(campaign_id, status, sid, status, phone) for campaign_id, phone, status, sid in deliveries])
+    
+    sent = [[row[1]] for row in deliveries if row[2] == 'sent']
+    sent += [row for row in rows if len(row) == 1]
+    cursor.executemany("UPDATE participants SET survey_sent = 1 WHERE phone_number = ?", sent)
+
+survey_status_writer = BatchWriter(
+    "survey-status", write_campaign_deliveries,
+    SURVEY_STATUS_BATCH_SIZE, SURVEY_STATUS_FLUSH_MS, SURVEY_SEND_LOG_PATH
+)
+
+def process_alive(pid):
+    """Whether a process with this pid exists on this host"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def replay_send_logs():
+    """
+    Apply campaign deliveries logged but not flushed by processes that are gone
+    Each gunicorn worker logs to survey_send.log.<pid>. Logs of live processes
+    are left alone; a dead worker's log is applied and deleted, so its last
+    sends are recorded before their leases expire and someone else claims them.
+    Runs at startup, when each worker starts, and on every lease heartbeat.
+    """
+    base = SURVEY_SEND_LOG_PATH
+    directory = os.path.dirname(base) or '.'
+    prefix = os.path.basename(base)
+    for name in sorted(os.listdir(directory)):
+        if name == prefix:
+            owner = None
+        elif name.startswith(prefix + '.') and name[len(prefix) + 1:].isdigit():
+            owner = int(name[len(prefix) + 1:])
+        else:
+            continue
+        if owner is not None and owner != os.getpid() and process_alive(owner):
+            continue
+        survey_status_writer.replay(os.path.join(directory, name))
+
+# Placeholder campaign holding survey_sent flags from before campaigns existed
+LEGACY_CAMPAIGN_URL = 'legacy:survey_sent'
+
+def migrate_legacy_survey_sent():
+    """
+    Carry survey_sent flags from before per-campaign tracking into campaign_recipients
+    The flag never recorded which survey was sent, so the flagged participants
+    are parked under a placeholder campaign that the first campaign created
+    afterwards takes over (see get_or_create_campaign). That first campaign
+    skips everyone who already got a survey before the upgrade; later
+    campaigns go to everyone. Runs once, on a database with no campaigns yet.
+    """
+    conn = get_db()
+    try:
+        with conn:
+            if conn.execute("SELECT 1 FROM campaigns LIMIT 1").fetchone():
+                return
+            if not conn.execute("SELECT 1 FROM participants WHERE survey_sent = 1 LIMIT 1").fetchone():
+                return
+            campaign_id = conn.execute(
+                "INSERT INTO campaigns (survey_url) VALUES (?)", (LEGACY_CAMPAIGN_URL,)
+            ).lastrowid
+            backfilled = conn.execute(
+                """INSERT INTO campaign_recipients (campaign_id, participant_id, status)
+                   SELECT ?, id, 'sent' FROM participants WHERE survey_sent = 1""",
+                (campaign_id,)
+            ).rowcount
+        logger.info("Backfilled %d legacy survey_sent participants into campaign tracking", backfilled)
+    finally:
+        release_db(conn)
+
+def get_or_create_campaign(survey_url):
+    """
+    Return the id of the campaign for survey_url, creating it on first use
+    The first campaign created takes over the legacy placeholder, if there is one
+    """
+    conn = get_db()
+    try:
+        with conn:
+            conn.execute(
+                """UPDATE campaigns SET survey_url = ?
+                   WHERE survey_url = ?
+                     AND NOT EXISTS (SELECT 1 FROM campaigns WHERE survey_url = ?)""",
+                (survey_url, LEGACY_CAMPAIGN_URL, survey_url)
+            )
+            conn.execute(
+                "INSERT INTO campaigns (survey_url) VALUES (?) ON CONFLICT(survey_url) DO NOTHING",
+                (survey_url,)
+            )
+        return conn.execute("SELECT id FROM campaigns WHERE survey_url = ?", (survey_url,)).fetchone()[0]
+    finally:
+        release_db(conn)
+
+# Consented participants still waiting for a campaign: not sent, and not
+# leased by a live sender. The outer query is a range scan of
+# idx_participants_consent in id order; the NOT EXISTS is a primary-key probe
+# into campaign_recipients. Parameters: campaign_id, current time.
+CAMPAIGN_PENDING_SQL = """
+    FROM participants p
+    WHERE p.consent_status = 'consented'
+      AND NOT EXISTS (
+          SELECT 1 FROM campaign_recipients r
+          WHERE r.campaign_id = ? AND r.participant_id = p.id
+            AND (r.status = 'sent' OR (r.status = 'sending' AND r.lease_expires_at > ?))
+      )
+"""
+CAMPAIGN_PAGE_SIZE = 50
+
+# Shared tail of the recipient claim statements: take the row unless it has
+# been sent or another sender's lease on it is still live
+CAMPAIGN_CLAIM_CONFLICT_SQL = """
+    ON CONFLICT(campaign_id, participant_id) DO UPDATE SET
+        status = 'sending',
+        lease_owner = excluded.lease_owner,
+        lease_expires_at = excluded.lease_expires_at,
+        attempts = attempts + 1,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE campaign_recipients.status != 'sent'
+      AND NOT (campaign_recipients.status = 'sending' AND campaign_recipients.lease_expires_at > ?)
+    RETURNING participant_id
+"""
+
+def count_campaign_pending(campaign_id):
+    """Number of consented participants still waiting for the campaign"""
+    conn = get_db()
+    try:
+        return conn.execute(
+            f"SELECT COUNT(*) {CAMPAIGN_PENDING_SQL}", (campaign_id, time.time())
+        ).fetchone()[0]
+    finally:
+        release_db(conn)
+
+def claim_campaign_batch(campaign_id, lease_owner, after_id, limit=CAMPAIGN_PAGE_SIZE):
+    """
+    Lease the next pending recipients after participant after_id
+    Returns [(participant_id, phone)] in id order; rows claimed concurrently by
+    another sender are never returned to both
+    """
+    now = time.time()
+    conn = get_db()
+    try:
+        with conn:
+            claimed = conn.execute(f"""
+                INSERT INTO campaign_recipients (campaign_id, participant_id, status, lease_owner, lease_expires_at)
+                SELECT ?, p.id, 'sending', ?, ? {CAMPAIGN_PENDING_SQL} AND p.id > ?
+                ORDER BY p.id LIMIT ?
+                {CAMPAIGN_CLAIM_CONFLICT_SQL}
+            """, (campaign_id, lease_owner, lease_expiry(), campaign_id, now, after_id, limit, now)).fetchall()
+        if not claimed:
+            return []
+        ids = [row[0] for row in claimed]
+        return conn.execute(
+            f"SELECT id, phone_number FROM participants WHERE id IN ({','.join('?' * len(ids))}) ORDER BY id",
+            ids
+        ).fetchall()
+    finally:
+        release_db(conn)
+
+def claim_campaign_recipient(campaign_id, lease_owner, phone):
+    """
+    Lease one recipient by phone number
+    Returns True if claimed, False if it was already sent or is leased by
+    another sender, and None if the number doesn't belong to a participant
+    """
+    now = time.time()
+    conn = get_db()
+    try:
+        participant = conn.execute(
+            "SELECT id FROM participants WHERE phone_number = ?", (phone,)
+        ).fetchone()
+        if participant is None:
+            return None
+        with conn:
+            claimed = conn.execute(f"""
+                INSERT INTO campaign_recipients (campaign_id, participant_id, status, lease_owner, lease_expires_at)
+                VALUES (?, ?, 'sending', ?, ?)
+                {CAMPAIGN_CLAIM_CONFLICT_SQL}
+            """, (campaign_id, participant[0], lease_owner, lease_expiry(), now)).fetchall()
+        return bool(claimed)
+    finally:
+        release_db(conn)
+
+def begin_recipient_lease():
+    """Start a lease token for one campaign send; the heartbeat renews it until released"""
+    token = f"{WORKER_ID}:{uuid.uuid4().hex[:8]}"
+    with _active_recipient_leases_lock:
+        _active_recipient_leases.add(token)
+    return token
+
+def release_recipient_lease(campaign_id, token):
+    """
+    End a campaign send: once buffered results are written, any row still
+    leased to the token was claimed but never sent, so its lease is expired
+    for the next sender to pick up
+    """
+    with _active_recipient_leases_lock:
+        _active_recipient_leases.discard(token)
+    survey_status_writer.flush()
+    
+    conn = get_db()
+    try:
+        with conn:
+            conn.execute(
+                """UPDATE campaign_recipients SET lease_expires_at = 0
+                   WHERE lease_owner = ? AND status = 'sending' AND campaign_id = ?""",
+                (token, campaign_id)
+            )
+    finally:
+        release_db(conn)
+
+def iter_campaign_claims(campaign_id, token):
+    """
+    Yield phone numbers of recipients leased to this send, a batch at a time
+    Batches are keyed on participant id, so rows that fail during this pass
+    aren't retried until the campaign is run again
+    """
+    last_id = 0
+    while True:
+        batch = claim_campaign_batch(campaign_id, token, last_id)
+        if not batch:
+            return
+        for participant_id, phone in batch:
+            yield phone
+        last_id = batch[-1][0]
+
+def campaign_recorder(campaign_id):
+    """on_sent/on_failed callbacks that queue delivery rows for the campaign"""
+    def on_sent(phone, sid):
+        survey_status_writer.add([campaign_id, phone, 'sent', sid])
     
-    return results
+    def on_failed(phone, reason):
+        survey_status_writer.add([campaign_id, phone, 'failed'])
+    
+    return on_sent, on_failed
 
-def send_survey_link(survey_url, custom_message=None):
-    """Send survey link to consented participants"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def format_survey_message(survey_url, custom_message=None):
+    """Survey text: the custom message (or the default greeting) with the URL"""
+    # Format the message properly - ALWAYS include the survey URL
+    if custom_message and custom_message.strip():
+        # If custom message provided, append the survey URL
+        return f"{custom_message.strip()} {survey_url}"
+    # Default message with survey URL
+    return f"Hi! Here's your survey link: {survey_url} Thank you for participating!"
+
+def send_targeted_survey(survey_url, phone_numbers, custom_message=None, progress=None):
+    """
+    Send survey link to specific phone numbers
+    Each participant is leased before sending, so numbers that have already
+    had this survey, or are being sent it elsewhere, are skipped
+    """
+    if not phone_numbers:
+        return {"status": "error", "message": "No phone numbers provided"}
     
-    # Get consented participants who haven't been sent this survey
-    cursor.execute(
-        "SELECT phone_number FROM participants WHERE consent_status = 'consented' AND survey_sent = 0"
+    campaign_id = get_or_create_campaign(survey_url)
+    message = format_survey_message(survey_url, custom_message)
+    on_sent, on_failed = campaign_recorder(campaign_id)
+    token = begin_recipient_lease()
+    
+    # Skipped numbers become blank entries so the job offset still advances;
+    # numbers that aren't participants can't be tracked and are sent as before
+    entries = (
+        (None, None, None) if claim_campaign_recipient(campaign_id, token, phone) is False
+        else (phone, message, None)
+        for phone in phone_numbers
     )
-    participants = cursor.fetchall()
-    conn.close()
+    try:
+        return dispatch_messages(entries, 'survey', progress, on_sent=on_sent, on_failed=on_failed)
+    finally:
+        release_recipient_lease(campaign_id, token)
+
+def send_survey_link(survey_url, custom_message=None, progress=None):
+    """
+    Send survey link to consented participants who haven't had this survey yet
+    Recipients are leased in batches, so any number of concurrent sends of the
+    same survey, in any process, split the participants between them
+    """
+    campaign_id = get_or_create_campaign(survey_url)
+    message = format_survey_message(survey_url, custom_message)
+    on_sent, on_failed = campaign_recorder(campaign_id)
+    token = begin_recipient_lease()
     
-    if not participants:
-        print("No consented participants to send survey to.")
-        return
+    entries = ((phone, message, None) for phone in iter_campaign_claims(campaign_id, token))
+    try:
+        results = dispatch_messages(entries, 'survey', progress, on_sent=on_sent, on_failed=on_failed)
+    finally:
+        release_recipient_lease(campaign_id, token)
     
-    # Format the message properly - ALWAYS include the survey URL
-    if custom_message:
-        # If custom message provided, append the survey URL
-        message = f"{custom_message.strip()} {survey_url}"
-    else:
-        # Default message with survey URL
-        message = f"Hi! Here's your survey link: {survey_url} Thank you for participating!"
-    
-    for (phone,) in participants:
-        if send_sms(phone, message):
-            # Mark as survey sent
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            cursor.execute(
-                "UPDATE participants SET survey_sent = 1 WHERE phone_number = ?",
-                (phone,)
-            )
-            conn.commit()
-            conn.close()
-        
-        import time
-        time.sleep(1)  # Rate limiting
+    if not results["success"] and not results["failed"]:
+        logger.info("No consented participants to send survey to.")
+    return results
 
-def get_filter_options():
-    """Get available filter options from the database"""
-    conn = sqlite3.connect(DB_PATH)
+# Filter options are built once and served from memory until participant data
+# changes in any process; writers bump the 'participants' data version
+
+# (options key, participants column) for each dropdown facet
+FILTER_OPTION_FACETS = [
+    ('genders', 'gender'),
+    ('regions', 'region'),
+    ('education_levels', 'education'),
+    ('phone_types', 'phone_type'),
+    ('vote_intents', 'last_fed_vote_intent'),
+]
+
+def build_filter_options():
+    """Compute every facet's distinct values and counts in one pass per column"""
+    conn = get_db()
     cursor = conn.cursor()
     
     try:
-        # Get unique values for dropdown options
         filter_options = {}
-        
-        # Gender options
-        cursor.execute("SELECT DISTINCT gender FROM participants WHERE gender IS NOT NULL AND gender != '' ORDER BY gender")
-        filter_options['genders'] = [row[0] for row in cursor.fetchall()]
-        
-        # Region options
-        cursor.execute("SELECT DISTINCT region FROM participants WHERE region IS NOT NULL AND region != '' ORDER BY region")
-        filter_options['regions'] = [row[0] for row in cursor.fetchall()]
-        
-        # Education options
-        cursor.execute("SELECT DISTINCT education FROM participants WHERE education IS NOT NULL AND education != '' ORDER BY education")
-        filter_options['education_levels'] = [row[0] for row in cursor.fetchall()]
-        
-        # Phone type options
-        cursor.execute("SELECT DISTINCT phone_type FROM participants WHERE phone_type IS NOT NULL AND phone_type != '' ORDER BY phone_type")
-        filter_options['phone_types'] = [row[0] for row in cursor.fetchall()]
-        
-        # Vote intent options
-        cursor.execute("SELECT DISTINCT last_fed_vote_intent FROM participants WHERE last_fed_vote_intent IS NOT NULL AND last_fed_vote_intent != '' ORDER BY last_fed_vote_intent")
-        filter_options['vote_intents'] = [row[0] for row in cursor.fetchall()]
+        counts = {}
+        
+        for key, column in FILTER_OPTION_FACETS:
+            cursor.execute(f"""
+                SELECT {column}, COUNT(*), SUM(consent_status = 'consented')
+                FROM participants
+                WHERE {column} IS NOT NULL AND {column} != ''
+                GROUP BY {column}
+                ORDER BY {column}
+            """)
+            rows = cursor.fetchall()
+            filter_options[key] = [row[0] for row in rows]
+            counts[key] = {row[0]: {"total": row[1], "consented": row[2]} for row in rows}
+        
+        filter_options['counts'] = counts
         
         # Age range
-        cursor.execute("SELECT MIN(CAST(age AS INTEGER)), MAX(CAST(age AS INTEGER)) FROM participants WHERE age IS NOT NULL AND age != '' AND age GLOB '[0-9]*'")
+        cursor.execute("SELECT MIN(age_num), MAX(age_num) FROM participants")
         age_range = cursor.fetchone()
         filter_options['age_range'] = {
             'min': age_range[0] if age_range[0] else 18,
             'max': age_range[1] if age_range[1] else 100
         }
         
+        return filter_options
+    finally:
+        release_db(conn)
+
+def bump_data_version(cursor, name):
+    """Mark data as changed; call inside the transaction that changes it"""
+    cursor.execute(
+        """INSERT INTO data_versions (name, version) VALUES (?, 1)
+           ON CONFLICT(name) DO UPDATE SET version = version + 1""",
+        (name,)
+    )
+
+def get_data_version(name):
+    conn = get_db()
+    try:
+        row = conn.execute("SELECT version FROM data_versions WHERE name = ?", (name,)).fetchone()
+    finally:
+        release_db(conn)
+    return row[0] if row else 0
+
+class FilterOptionsCache:
+    """
+    Cached filter options plus an ETag for them
+    Each get() checks the 'participants' data version, so a write committed
+    by any process is seen on the next read. A rebuild that races with a
+    write is thrown away on the following read.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._built_version = None
+        self._options = None
+        self._etag = None
+    
+    def _cached(self, version):
+        with self._lock:
+            if self._options is not None and self._built_version == version:
+                return self._options, self._etag
+        return None
+    
+    def get(self):
+        """Return (options, etag), rebuilding if anything changed since the last build"""
+        cached = self._cached(get_data_version('participants'))
+        if cached:
+            return cached
+        
+        # One rebuild at a time; concurrent readers wait and reuse its result
+        with self._build_lock:
+            version = get_data_version('participants')
+            cached = self._cached(version)
+            if cached:
+                return cached
+            
+            options = build_filter_options()
+            etag = hashlib.sha1(json.dumps(options, sort_keys=True).encode('utf-8')).hexdigest()
+            
+            with self._lock:
+                self._options = options
+                self._etag = etag
+                self._built_version = version
+            return options, etag
+
+filter_options_cache = FilterOptionsCache()
+
+def get_filter_options():
+    """Get available filter options, from the cache when participant data hasn't changed"""
+    try:
+        options, _ = filter_options_cache.get()
         return {
             "status": "success",
-            "options": filter_options
+            "options": options
         }
         
     except Exception as e:
-        print(f"Error getting filter options: {e}")
+        logger.exception("Error getting filter options: %s", e)
         return {
             "status": "error",
             "message": str(e),
             "options": {}
         }
-    finally:
-        conn.close()
 
-def send_mass_sms(phone_numbers, message):
+def send_mass_sms(phone_numbers, message, progress=None):
     """Send custom SMS message to a list of phone numbers"""
     if not phone_numbers:
         return {"status": "error", "message": "No phone numbers provided"}
@@ -749,121 +2409,82 @@ def send_mass_sms(phone_numbers, message):
     if not message or not message.strip():
         return {"status": "error", "message": "Message cannot be empty"}
     
-    results = {"success": [], "failed": []}
+    message = message.strip()
     
-    for phone in phone_numbers:
-        # Clean and validate phone number
-        phone = phone.strip()
-        if not phone:
-            continue
-            
-        if not is_valid_phone_number(phone):
-            results["failed"].append({"phone": phone, "reason": "Invalid phone number format"})
-            continue
-        
-        # Normalize phone number
-        normalized_phone = normalize_phone_number(phone)
-        
-        # Send SMS
-        if send_sms(normalized_phone, message.strip()):
-            results["success"].append(normalized_phone)
-        else:
-            results["failed"].append({"phone": normalized_phone, "reason": "Failed to send SMS"})
-        
-        # Add small delay for rate limiting
-        import time
-        time.sleep(1)
+    def entries():
+        for phone in phone_numbers:
+            # Clean and validate phone number
+            phone = phone.strip()
+            if not phone:
+                yield None, None, None
+            elif not is_valid_phone_number(phone):
+                yield phone, None, "Invalid phone number format"
+            else:
+                yield normalize_phone_number(phone), message, None
+    
+    results = dispatch_messages(entries(), 'mass_sms', progress)
     
     # Add the missing status to results
     results["status"] = "success"
     return results
 
-def process_mass_sms_csv(file_content):
+def process_mass_sms_csv(csv_source):
     """Process CSV file for mass SMS (extract phone numbers only)"""
     try:
-        # Try to decode the file content as UTF-8
-        if isinstance(file_content, bytes):
-            file_content = file_content.decode('utf-8')
-        
-        print("MASS SMS CSV DEBUGGING: File content decoded successfully")
+        reader = csv.reader(open_csv_text(csv_source))
+        first_row = next(reader, None)
         
-        # Use StringIO to create a file-like object
-        csv_file = io.StringIO(file_content)
-        
-        # Try to read the CSV file
-        reader = csv.reader(csv_file)
-        
-        # Get all rows
-        rows = list(reader)
-        
-        print(f"MASS SMS CSV DEBUGGING: CSV has {len(rows)} rows (including header)")
-        
-        if not rows:
+        if not first_row:
             return {"status": "error", "message": "CSV file is empty"}
         
-        # Print the first few rows for debugging
-        print("MASS SMS CSV DEBUGGING: First 2 rows:")
-        for i, row in enumerate(rows[:2]):
-            print(f"  Row {i}: {row}")
-        
-        # Extract phone numbers
-        phone_numbers = []
-        
-        # Check the first row for headers
-        first_row = rows[0]
-        header_row = True
-        
-        print(f"MASS SMS CSV DEBUGGING: Headers: {first_row}")
+        logger.debug("Mass SMS CSV headers: %s", first_row)
         
         # Look for columns that might contain phone numbers
-        phone_col_indices = []
-        for i, header in enumerate(first_row):
-            header_lower = header.lower().strip()
-            print(f"MASS SMS CSV DEBUGGING: Checking header '{header}' (lower: '{header_lower}')")
-            if header_lower == 'phone_number' or any(keyword in header_lower for keyword in ['phone', 'mobile', 'cell', 'contact', 'number', 'tel']):
-                phone_col_indices.append(i)
-                print(f"MASS SMS CSV DEBUGGING: Found potential phone column: '{header}' at index {i}")
+        phone_col_indices = compile_csv_plan(first_row).phone_indexes
+        header_row = True
         
         # If we couldn't find any phone columns, maybe the first row isn't a header
         if not phone_col_indices:
-            print("MASS SMS CSV DEBUGGING: No phone columns found in header row")
+            logger.debug("Mass SMS CSV: no phone columns found in header row")
             # Check if the first row might contain phone numbers itself
             for i, cell in enumerate(first_row):
-                cell_value = str(cell).strip()
-                print(f"MASS SMS CSV DEBUGGING: Testing if '{cell_value}' is a valid phone number")
+                cell_value = cell.strip()
                 if cell_value and is_valid_phone_number(cell_value):
-                    print(f"MASS SMS CSV DEBUGGING: Found valid phone number in first row: {cell_value}")
+                    logger.debug("Mass SMS CSV: found valid phone number in first row: %s", cell_value)
                     header_row = False
                     phone_col_indices.append(i)
                     break
         
         # If we still couldn't find phone columns, try the first column
         if not phone_col_indices:
-            print("MASS SMS CSV DEBUGGING: Using first column as default phone column")
+            logger.debug("Mass SMS CSV: using first column as default phone column")
             phone_col_indices.append(0)
         
-        print(f"MASS SMS CSV DEBUGGING: Using columns at indices {phone_col_indices} for phone numbers")
-        print(f"MASS SMS CSV DEBUGGING: Treating first row as header: {header_row}")
+        logger.debug("Mass SMS CSV: using columns at indices %s for phone numbers", phone_col_indices)
+        logger.debug("Mass SMS CSV: treating first row as header: %s", header_row)
         
-        # Start from the appropriate row (skip header if we identified one)
+        # Start from the appropriate row (include the first row if it wasn't a header)
         start_row = 1 if header_row else 0
+        rows = reader if header_row else itertools.chain([first_row], reader)
         
-        # Extract phone numbers from identified columns
+        # Extract phone numbers from identified columns, removing duplicates while preserving order
+        unique_phones = []
+        seen = set()
         valid_phones_found = 0
         invalid_phones_found = 0
         
-        for row_idx, row in enumerate(rows[start_row:], start=start_row):
+        for row_idx, row in enumerate(rows, start=start_row):
             phone_found = False
+            width = len(row)
             for col_idx in phone_col_indices:
-                if col_idx < len(row):
-                    cell_value = str(row[col_idx]).strip()
+                if col_idx < width:
+                    cell_value = row[col_idx].strip()
                     if cell_value:
-                        is_valid = is_valid_phone_number(cell_value)
-                        print(f"MASS SMS CSV DEBUGGING: Row {row_idx}, Column {col_idx}: '{cell_value}' Valid: {is_valid}")
-                        if is_valid:
+                        if is_valid_phone_number(cell_value):
                             normalized = normalize_phone_number(cell_value)
-                            print(f"MASS SMS CSV DEBUGGING: Normalized: {normalized}")
-                            phone_numbers.append(normalized)
+                            if normalized not in seen:
+                                seen.add(normalized)
+                                unique_phones.append(normalized)
                             valid_phones_found += 1
                             phone_found = True
                             break
@@ -871,19 +2492,10 @@ def process_mass_sms_csv(file_content):
                             invalid_phones_found += 1
             
             if not phone_found and row_idx < start_row + 5:  # Only log first few rows to avoid flooding logs
-                print(f"MASS SMS CSV DEBUGGING: No valid phone number found in row {row_idx}")
-        
-        print(f"MASS SMS CSV DEBUGGING: Found {valid_phones_found} valid and {invalid_phones_found} invalid phone numbers")
-        
-        # Remove duplicates while preserving order
-        unique_phones = []
-        seen = set()
-        for phone in phone_numbers:
-            if phone not in seen:
-                seen.add(phone)
-                unique_phones.append(phone)
+                logger.debug("Mass SMS CSV: no valid phone number found in row %d", row_idx, extra=SAMPLED)
         
-        print(f"MASS SMS CSV DEBUGGING: Returning {len(unique_phones)} unique phone numbers")
+        logger.info("Mass SMS CSV found %d valid and %d invalid phone numbers", valid_phones_found, invalid_phones_found)
+        logger.debug("Mass SMS CSV: returning %d unique phone numbers", len(unique_phones))
         
         return {
             "status": "success", 
@@ -892,40 +2504,863 @@ def process_mass_sms_csv(file_content):
         }
     
     except Exception as e:
-        print(f"MASS SMS CSV DEBUGGING ERROR: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error processing mass SMS CSV: %s", e)
         return {"status": "error", "message": f"Error processing CSV: {str(e)}"}
 
+# ---------------------------------------------------------------------------
+# Background send queue
+#
+# Bulk sends are stored as jobs in the send_jobs table and drained by a pool of
+# worker threads, so the HTTP request that creates a campaign returns right
+# away and an interrupted campaign picks up where it left off after a restart.
+# ---------------------------------------------------------------------------
+
+JOB_WORKER_COUNT = int(os.getenv('JOB_WORKERS', 2))
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1.0))
+JOB_SAVE_EVERY = 25  # Persist progress after this many recipients...
+JOB_SAVE_INTERVAL = 2.0  # ...or after this many seconds, whichever comes first
+JOB_MAX_STORED_FAILURES = 500
+
+_job_wakeup = threading.Event()
+_job_workers = []
+_job_workers_lock = threading.Lock()
+
+class LeaseLost(Exception):
+    """The job's lease expired and another worker has taken it over"""
+
+class JobProgress:
+    """
+    Collects per-recipient results for a running job and persists them periodically
+    Saves are fenced on the lease owner, so a worker that lost its lease
+    stops instead of overwriting the new owner's progress
+    """
+    
+    def __init__(self, job_id, processed=0, success_count=0, failed_count=0, failures=None):
+        self.job_id = job_id
+        self.processed = processed
+        self.success_count = success_count
+        self.failed_count = failed_count
+        self.failures = failures or []
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def record(self, phone, ok, reason=None):
+        """Record the outcome of one recipient"""
+        with self._lock:
+            self.processed += 1
+            if ok:
+                self.success_count += 1
+            else:
+                self.failed_count += 1
+                if len(self.failures) < JOB_MAX_STORED_FAILURES:
+                    self.failures.append({"phone": phone, "reason": reason or "Failed to send SMS"})
+            self._unsaved += 1
+        self.save()
+    
+    def skip(self):
+        """Count a blank entry so the resume offset stays aligned with the payload"""
+        with self._lock:
+            self.processed += 1
+            self._unsaved += 1
+    
+    def save(self, force=False):
+        """Write progress to the database if enough has changed since the last save"""
+        with self._lock:
+            due = (
+                self._unsaved >= JOB_SAVE_EVERY
+                or time.monotonic() - self._last_save >= JOB_SAVE_INTERVAL
+            )
+            if not force and not (self._unsaved and due):
+                return
+            values = (
+                self.processed, self.success_count, self.failed_count,
+                json.dumps(self.failures), lease_expiry(), self.job_id, WORKER_ID
+            )
+            self._unsaved = 0
+            self._last_save = time.monotonic()
+        
+        conn = get_db()
+        try:
+            cursor = conn.execute(
+                """UPDATE send_jobs
+                   SET processed = ?, success_count = ?, failed_count = ?, failures = ?,
+                       lease_expires_at = ?, updated_at = CURRENT_TIMESTAMP
+                   WHERE id = ? AND lease_owner = ?""",
+                values
+            )
+            conn.commit()
+            owned = cursor.rowcount > 0
+        except Exception as e:
+            logger.error("Error saving progress for job %s: %s", self.job_id, e)
+            owned = True
+        finally:
+            release_db(conn)
+        
+        if not owned:
+            raise LeaseLost(self.job_id)
+
+def enqueue_job(job_type, payload, total):
+    """Add a send job to the persistent queue and return its id"""
+    job_id = str(uuid.uuid4())
+    
+    conn = get_db()
+    try:
+        conn.execute(
+            "INSERT INTO send_jobs (id, job_type, payload, total) VALUES (?, ?, ?, ?)",
+            (job_id, job_type, json.dumps(payload), total)
+        )
+        conn.commit()
+    finally:
+        release_db(conn)
+    
+    logger.info("Queued %s job %s for %d recipients", job_type, job_id, total)
+    _job_wakeup.set()
+    return job_id
+
+def find_active_job(job_type, survey_url):
+    """Id of a queued or running job of this type for the same survey, if there is one"""
+    conn = get_db()
+    try:
+        row = conn.execute(
+            """SELECT id FROM send_jobs
+               WHERE status IN ('queued', 'running') AND job_type = ?
+                 AND json_extract(payload, '$.survey_url') = ?
+               ORDER BY created_at LIMIT 1""",
+            (job_type, survey_url)
+        ).fetchone()
+    finally:
+        release_db(conn)
+    return row[0] if row else None
+
+def get_job(job_id):
+    """Return the public view of a job, or None if it does not exist"""
+    conn = get_db()
+    try:
+        row = conn.execute(
+            """SELECT id, job_type, status, total, processed, success_count, failed_count,
+                      failures, error, created_at, started_at, finished_at, updated_at
+               FROM send_jobs WHERE id = ?""",
+            (job_id,)
+        ).fetchone()
+    finally:
+        release_db(conn)
+    
+    if not row:
+        return None
+    
+    return {
+        "id": row[0],
+        "type": row[1],
+        "status": row[2],
+        "total": row[3],
+        "processed": row[4],
+        "successful_sends": row[5],
+        "failed_sends": row[6],
+        "failures": json.loads(row[7]) if row[7] else [],
+        "error": row[8],
+        "created_at": row[9],
+        "started_at": row[10],
+        "finished_at": row[11],
+        "updated_at": row[12]
+    }
+
+def claim_next_job():
+    """
+    Atomically lease the oldest runnable job to this process and return it
+    Runnable means queued, or running under a lease that has expired because
+    its worker died
+    """
+    now = time.time()
+    conn = get_db()
+    try:
+        row = conn.execute(
+            """UPDATE send_jobs
+               SET status = 'running',
+                   lease_owner = ?,
+                   lease_expires_at = ?,
+                   started_at = COALESCE(started_at, CURRENT_TIMESTAMP),
+                   updated_at = CURRENT_TIMESTAMP
+               WHERE id = (
+                   SELECT id FROM send_jobs
+                   WHERE status = 'queued' OR (status = 'running' AND lease_expires_at < ?)
+                   ORDER BY created_at, rowid LIMIT 1
+               )
+               RETURNING id, job_type, payload, processed, success_count, failed_count, failures""",
+            (WORKER_ID, lease_expiry(), now)
+        ).fetchone()
+        conn.commit()
+    finally:
+        release_db(conn)
+    return row
+
+def requeue_job(job_id):
+    """Put a job interrupted by shutdown back in the queue; it resumes from its saved offset"""
+    conn = get_db()
+    try:
+        conn.execute(
+            """UPDATE send_jobs
+               SET status = 'queued', lease_owner = NULL, lease_expires_at = NULL,
+                   updated_at = CURRENT_TIMESTAMP
+               WHERE id = ? AND lease_owner = ?""",
+            (job_id, WORKER_ID)
+        )
+        conn.commit()
+    finally:
+        release_db(conn)
+    _job_wakeup.set()
+
+def finish_job(job_id, status, error=None):
+    """Mark a job as completed or failed"""
+    conn = get_db()
+    try:
+        conn.execute(
+            """UPDATE send_jobs
+               SET status = ?, error = ?, finished_at = CURRENT_TIMESTAMP,
+                   lease_owner = NULL, lease_expires_at = NULL,
+                   updated_at = CURRENT_TIMESTAMP
+               WHERE id = ? AND lease_owner = ?""",
+            (status, error, job_id, WORKER_ID)
+        )
+        conn.commit()
+    finally:
+        release_db(conn)
+
+def count_upload_participants(upload_id):
+    """Number of participants tagged with a CSV upload id"""
+    conn = get_db()
+    try:
+        return conn.execute(
+            "SELECT COUNT(*) FROM participants WHERE upload_id = ?", (upload_id,)
+        ).fetchone()[0]
+    finally:
+        release_db(conn)
+
+def iter_upload_phone_numbers(upload_id, offset=0, page_size=1000):
+    """Yield phone numbers from a CSV upload in id order, one page at a time"""
+    conn = get_db()
+    rows = conn.execute(
+        "SELECT id, phone_number FROM participants WHERE upload_id = ? ORDER BY id LIMIT ? OFFSET ?",
+        (upload_id, page_size, offset)
+    ).fetchall()
+    while rows:
+        for _, phone in rows:
+            yield phone
+        rows = conn.execute(
+            "SELECT id, phone_number FROM participants WHERE upload_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (upload_id, rows[-1][0], page_size)
+        ).fetchall()
+
+def run_consent_job(payload, progress):
+    """Job handler for bulk consent requests"""
+    if "upload_id" in payload:
+        remaining = iter_upload_phone_numbers(payload["upload_id"], offset=progress.processed)
+    else:
+        remaining = payload["phone_numbers"][progress.processed:]
+    send_consent_request(remaining, progress=progress)
+
+def run_mass_sms_job(payload, progress):
+    """Job handler for mass SMS"""
+    remaining = payload["phone_numbers"][progress.processed:]
+    if remaining:
+        send_mass_sms(remaining, payload["message"], progress=progress)
+
+def run_survey_job(payload, progress):
+    """Job handler for sending a survey to all consented participants"""
+    # Recipients already delivered this campaign are skipped, so no offset is needed on resume
+    send_survey_link(payload["survey_url"], payload.get("custom_message"), progress=progress)
+
+def run_targeted_survey_job(payload, progress):
+    """Job handler for sending a survey to selected participants"""
+    remaining = payload["phone_numbers"][progress.processed:]
+    if remaining:
+        send_targeted_survey(
+            payload["survey_url"], remaining, payload.get("custom_message"), progress=progress
+        )
+
+JOB_HANDLERS = {
+    "consent": run_consent_job,
+    "mass_sms": run_mass_sms_job,
+    "survey": run_survey_job,
+    "targeted_survey": run_targeted_survey_job
+}
+
+def run_job(job):
+    """Run one claimed job to completion"""
+    job_id, job_type, payload, processed, success_count, failed_count, failures = job
+    logger.info("Starting %s job %s at offset %d", job_type, job_id, processed)
+    
+    progress = JobProgress(
+        job_id, processed, success_count, failed_count,
+        json.loads(failures) if failures else []
+    )
+    
+    try:
+        handler = JOB_HANDLERS[job_type]
+        handler(json.loads(payload), progress)
+        progress.save(force=True)
+        finish_job(job_id, 'completed')
+        logger.info("Finished job %s: %d sent, %d failed", job_id, progress.success_count, progress.failed_count)
+    except LeaseLost:
+        logger.warning("Lost the lease on job %s at offset %d; another worker has it", job_id, progress.processed)
+    except SendInterrupted:
+        try:
+            progress.save(force=True)
+        except LeaseLost:
+            return
+        requeue_job(job_id)
+        logger.info("Job %s interrupted by shutdown at offset %d; requeued", job_id, progress.processed)
+    except Exception as e:
+        logger.exception("Job %s failed: %s", job_id, e)
+        try:
+            progress.save(force=True)
+        except LeaseLost:
+            return
+        finish_job(job_id, 'failed', str(e))
+
+def job_worker_loop():
+    """Worker thread: claim and run queued jobs until the process shuts down"""
+    while not _shutting_down.is_set():
+        try:
+            job = claim_next_job()
+        except Exception as e:
+            logger.error("Error claiming job: %s", e)
+            job = None
+        
+        if job:
+            run_job(job)
+            continue
+        
+        _job_wakeup.wait(JOB_POLL_INTERVAL)
+        _job_wakeup.clear()
+
+def requeue_interrupted_jobs():
+    """
+    Put jobs whose worker is gone back in the queue
+    Only expired (or pre-lease) leases are touched, so jobs being run by other
+    live processes or nodes keep going
+    """
+    conn = get_db()
+    try:
+        cursor = conn.execute(
+            """UPDATE send_jobs SET status = 'queued', lease_owner = NULL, lease_expires_at = NULL
+               WHERE status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at < ?)""",
+            (time.time(),)
+        )
+        if cursor.rowcount:
+            logger.info("Requeued %d interrupted send jobs", cursor.rowcount)
+        conn.commit()
+    finally:
+        release_db(conn)
+
+def renew_leases():
+    """Extend every lease this process holds on jobs, campaign recipients, inbound messages and replies"""
+    with _active_recipient_leases_lock:
+        tokens = list(_active_recipient_leases)
+    
+    expires = lease_expiry()
+    conn = get_db()
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE send_jobs SET lease_expires_at = ? WHERE status = 'running' AND lease_owner = ?",
+                (expires, WORKER_ID)
+            )
+            if tokens:
+                conn.execute(
+                    f"""UPDATE campaign_recipients SET lease_expires_at = ?
+                        WHERE status = 'sending' AND lease_owner IN ({','.join('?' * len(tokens))})""",
+                    [expires] + tokens
+                )
+            conn.execute(
+                "UPDATE inbound_messages SET lease_expires_at = ? WHERE status = 'processing' AND lease_owner = ?",
+                (expires, WORKER_ID)
+            )
+            conn.execute(
+                "UPDATE outbound_replies SET lease_expires_at = ? WHERE lease_owner = ?",
+                (expires, WORKER_ID)
+            )
+    finally:
+        release_db(conn)
+
+def lease_heartbeat_loop():
+    """
+    Heartbeat thread: renew this process's leases until it shuts down, record
+    the unflushed sends of any worker that died and pick up its unsent replies
+    """
+    while not _shutting_down.wait(LEASE_HEARTBEAT_INTERVAL):
+        try:
+            renew_leases()
+        except Exception as e:
+            logger.error("Error renewing leases: %s", e)
+        try:
+            replay_send_logs()
+        except Exception as e:
+            logger.error("Error replaying send logs: %s", e)
+        try:
+            resume_pending_replies()
+        except Exception as e:
+            logger.error("Error resuming auto-replies: %s", e)
+
+def start_job_workers():
+    """Start this process's pool of send job workers and its lease heartbeat"""
+    with _job_workers_lock:
+        if _job_workers:
+            return
+        
+        heartbeat = threading.Thread(target=lease_heartbeat_loop, name="lease-heartbeat", daemon=True)
+        heartbeat.start()
+        
+        for i in range(JOB_WORKER_COUNT):
+            worker = threading.Thread(target=job_worker_loop, name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            _job_workers.append(worker)
+        logger.info("Started %d send job workers", JOB_WORKER_COUNT)
+
+# Delivery receipts from Twilio's StatusCallback are buffered in memory and
+# appended in large chunks by a background thread; the callback itself only
+# ever appends to a list
+DELIVERY_RECEIPT_BATCH_SIZE = int(os.getenv('DELIVERY_RECEIPT_BATCH_SIZE', 500))
+DELIVERY_RECEIPT_FLUSH_MS = int(os.getenv('DELIVERY_RECEIPT_FLUSH_MS', 250))
+
+def write_delivery_receipts(cursor, rows):
+    cursor.executemany('''
+        INSERT INTO message_status_events (message_sid, status, error_code, to_number, received_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''', rows)
+
+delivery_receipt_writer = BatchWriter(
+    "delivery-receipts", write_delivery_receipts,
+    DELIVERY_RECEIPT_BATCH_SIZE, DELIVERY_RECEIPT_FLUSH_MS,
+    flush_in_background=True
+)
+# Nothing is logged to disk for receipts, so flush what's buffered on a clean shutdown
+atexit.register(delivery_receipt_writer.close)
+
+def write_outbound_messages(cursor, rows):
+    cursor.executemany('''
+        INSERT OR IGNORE INTO outbound_messages (message_sid, kind, to_number, job_id, sent_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''', rows)
+
+outbound_message_writer = BatchWriter(
+    "outbound-messages", write_outbound_messages,
+    DELIVERY_RECEIPT_BATCH_SIZE, DELIVERY_RECEIPT_FLUSH_MS,
+    flush_in_background=True
+)
+atexit.register(outbound_message_writer.close)
+
+def record_outbound_message(message_sid, kind, to_number, job_id=None):
+    """Remember a sent message's SID so its delivery receipts can be matched to it"""
+    outbound_message_writer.add([
+        message_sid, kind, to_number, job_id, datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    ])
+
+# How auto-replies to inbound messages are delivered:
+#   'twiml' - returned inline as a <Message> in the webhook response (no extra API call)
+#   'queue' - handed to the outbound send pool and sent after the webhook returns
+WEBHOOK_REPLY_MODE = os.getenv('WEBHOOK_REPLY_MODE', 'twiml').lower()
+
+def build_twiml(message=None):
+    """Build a TwiML response, optionally replying with a message"""
+    if message:
+        return f'<?xml version="1.0" encoding="UTF-8"?><Response><Message>{escape(message)}</Message></Response>'
+    return '<?xml version="1.0" encoding="UTF-8"?><Response></Response>'
+
+def send_reply(to_number, message_body, reply_id=None):
+    """
+    Send an auto-reply through the rate limiter and record its SID
+    A queued reply (reply_id) is dropped from outbound_replies once it has
+    been sent or Twilio has refused it. One cut short by shutdown stays, and
+    release_pending_replies hands it to the next process.
+    """
+    sid = _rate_limited_send(to_number, message_body)
+    if isinstance(sid, str):
+        record_outbound_message(sid, 'reply', to_number)
+    if reply_id is not None and not (sid is False and _shutting_down.is_set()):
+        conn = get_db()
+        try:
+            conn.execute(
+                "DELETE FROM outbound_replies WHERE id = ? AND lease_owner = ?",
+                (reply_id, WORKER_ID)
+            )
+            conn.commit()
+        finally:
+            release_db(conn)
+    return sid
+
+def queue_reply(to_number, message_body):
+    """
+    Send an auto-reply from the outbound pool so the webhook doesn't wait on Twilio
+    The reply is stored, leased to this process, before it is handed to the
+    pool, so a shutdown or crash while it waits for the rate limiter doesn't lose it
+    """
+    conn = get_db()
+    try:
+        reply_id = conn.execute(
+            """INSERT INTO outbound_replies (to_number, body, lease_owner, lease_expires_at, created_at)
+               VALUES (?, ?, ?, ?, ?) RETURNING id""",
+            (to_number, message_body, WORKER_ID, lease_expiry(),
+             datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
+        ).fetchone()[0]
+        conn.commit()
+    finally:
+        release_db(conn)
+    get_send_executor().submit(send_reply, to_number, message_body, reply_id)
+
+def resume_pending_replies():
+    """
+    Lease and send the replies no process is working on: released at shutdown,
+    or left under an expired lease by a process that died
+    """
+    if _shutting_down.is_set():
+        return
+    conn = get_db()
+    try:
+        rows = conn.execute(
+            """UPDATE outbound_replies SET lease_owner = ?, lease_expires_at = ?
+               WHERE lease_owner IS NULL OR lease_expires_at < ?
+               RETURNING id, to_number, body""",
+            (WORKER_ID, lease_expiry(), time.time())
+        ).fetchall()
+        conn.commit()
+    finally:
+        release_db(conn)
+    
+    if rows:
+        logger.info("Resuming %d unsent auto-replies", len(rows))
+    executor = get_send_executor()
+    for reply_id, to_number, message_body in sorted(rows):
+        executor.submit(send_reply, to_number, message_body, reply_id)
+
+def release_pending_replies():
+    """Hand this process's unsent replies back for another process to send (shutdown)"""
+    conn = get_db()
+    try:
+        cursor = conn.execute(
+            "UPDATE outbound_replies SET lease_owner = NULL, lease_expires_at = NULL WHERE lease_owner = ?",
+            (WORKER_ID,)
+        )
+        conn.commit()
+    finally:
+        release_db(conn)
+    if cursor.rowcount:
+        logger.warning("Shutting down; %d auto-replies left for the next process", cursor.rowcount)
+
+# Twilio retries a webhook that was slow to answer, with the same MessageSid.
+# SIDs that were processed (or durably queued) are remembered here with the
+# reply that was sent, so a retry is answered without touching the database
+# or the Twilio API. A message that failed isn't remembered, so its retry is
+# processed again. The unique index on responses.message_sid backs this up
+# across processes and for SIDs that have been evicted.
+INBOUND_DEDUP_CACHE_SIZE = int(os.getenv('INBOUND_DEDUP_CACHE_SIZE', 10000))
+
+class RecentMessageCache:
+    """Bounded LRU of inbound MessageSid -> reply text (None when there was no reply)"""
+    
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def lookup(self, message_sid):
+        """Return (seen, reply) for a SID"""
+        with self._lock:
+            if message_sid not in self._entries:
+                return False, None
+            self._entries.move_to_end(message_sid)
+            return True, self._entries[message_sid]
+    
+    def remember(self, message_sid, reply):
+        with self._lock:
+            self._entries[message_sid] = reply
+            self._entries.move_to_end(message_sid)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+recent_inbound = RecentMessageCache(INBOUND_DEDUP_CACHE_SIZE)
+
+# ---------------------------------------------------------------------------
+# Inbound queue
+#
+# In fast-ack mode the webhook only appends the raw message to the
+# inbound_messages table and returns an empty TwiML response. A pool of
+# consumer threads applies the consent state machine afterwards and sends any
+# reply through the outbound pool. Messages from the same number are processed
+# strictly in arrival order; different numbers are processed in parallel.
+# ---------------------------------------------------------------------------
+
+# 'sync'  - process the message inside the webhook request (replies can go inline as TwiML)
+# 'queue' - persist it and acknowledge immediately; replies are always sent via the API
+WEBHOOK_INGEST_MODE = os.getenv('WEBHOOK_INGEST_MODE', 'sync').lower()
+INBOUND_CONSUMER_COUNT = int(os.getenv('INBOUND_CONSUMERS', 2))
+INBOUND_BATCH_SIZE = int(os.getenv('INBOUND_BATCH_SIZE', 20))
+INBOUND_POLL_INTERVAL = float(os.getenv('INBOUND_POLL_INTERVAL', 0.5))
+# Attempts before a message is set aside as 'failed' so the sender's later messages can go through
+INBOUND_MAX_ATTEMPTS = int(os.getenv('INBOUND_MAX_ATTEMPTS', 5))
+
+_inbound_wakeup = threading.Event()
+_inbound_consumers = []
+_inbound_consumers_lock = threading.Lock()
+
+def enqueue_inbound(from_number, message_body, message_sid=None):
+    """
+    Durably append an inbound message for the consumers; this is all the webhook waits on
+    A SID that is already queued is ignored. Returns once the message is committed
+    """
+    conn = get_db()
+    try:
+        conn.execute(
+            """INSERT OR IGNORE INTO inbound_messages (from_number, phone_e164, body, message_sid, received_at)
+               VALUES (?, ?, ?, ?, ?)""",
+            (from_number, to_e164(from_number), message_body, message_sid,
+             datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
+        )
+        conn.commit()
+    finally:
+        release_db(conn)
+    _inbound_wakeup.set()
+
+def claim_inbound_batch(limit=INBOUND_BATCH_SIZE):
+    """
+    Lease up to `limit` inbound messages to this process, oldest first
+    A message is only claimable when no earlier message from the same number
+    is still in the table (pending, retrying, or being processed by some
+    consumer), so at most one message per number is in flight. Messages under
+    an expired lease are claimed again, unless they have used up their
+    attempts; those are marked 'failed' and no longer hold up the sender.
+    """
+    now = time.time()
+    conn = get_db()
+    try:
+        # A consumer that died on a message's last attempt never got to mark it
+        conn.execute(
+            """UPDATE inbound_messages SET status = 'failed', lease_owner = NULL, lease_expires_at = NULL
+               WHERE status != 'failed' AND lease_expires_at < ? AND attempts >= ?""",
+            (now, INBOUND_MAX_ATTEMPTS)
+        )
+        rows = conn.execute(
+            """UPDATE inbound_messages
+               SET status = 'processing', lease_owner = ?, lease_expires_at = ?, attempts = attempts + 1
+               WHERE id IN (
+                   SELECT m.id FROM inbound_messages m
+                   WHERE (m.status = 'pending' OR m.lease_expires_at < ?)
+                     AND NOT EXISTS (
+                         SELECT 1 FROM inbound_messages e
+                         WHERE e.phone_e164 = m.phone_e164 AND e.id < m.id AND e.status != 'failed'
+                     )
+                   ORDER BY m.id LIMIT ?
+               )
+               RETURNING id, from_number, body, message_sid, attempts""",
+            (WORKER_ID, lease_expiry(), now, limit)
+        ).fetchall()
+        conn.commit()
+    finally:
+        release_db(conn)
+    return sorted(rows)
+
+def complete_inbound(message_id):
+    """Drop a processed message, which unblocks the sender's next one"""
+    conn = get_db()
+    try:
+        conn.execute(
+            "DELETE FROM inbound_messages WHERE id = ? AND lease_owner = ?",
+            (message_id, WORKER_ID)
+        )
+        conn.commit()
+    finally:
+        release_db(conn)
+
+def fail_inbound(message_id, attempts, error):
+    """
+    Record a processing failure
+    The message keeps its lease, so neither it nor the sender's later messages
+    are picked up until the lease expires and it is retried. After
+    INBOUND_MAX_ATTEMPTS it is marked 'failed' and left for inspection.
+    """
+    dead = attempts >= INBOUND_MAX_ATTEMPTS
+    conn = get_db()
+    try:
+        if dead:
+            conn.execute(
+                """UPDATE inbound_messages
+                   SET status = 'failed', lease_owner = NULL, lease_expires_at = NULL, last_error = ?
+                   WHERE id = ? AND lease_owner = ?""",
+                (error, message_id, WORKER_ID)
+            )
+        else:
+            # 'retrying' rather than 'processing' so renew_leases lets the lease run out
+            conn.execute(
+                """UPDATE inbound_messages SET status = 'retrying', lease_expires_at = ?, last_error = ?
+                   WHERE id = ? AND lease_owner = ?""",
+                (lease_expiry(), error, message_id, WORKER_ID)
+            )
+        conn.commit()
+    finally:
+        release_db(conn)
+    return dead
+
+def release_inbound(message_ids):
+    """Hand claimed but unprocessed messages back to the queue (shutdown)"""
+    if not message_ids:
+        return
+    conn = get_db()
+    try:
+        conn.execute(
+            f"""UPDATE inbound_messages SET status = 'pending', lease_owner = NULL, lease_expires_at = NULL
+                WHERE lease_owner = ? AND id IN ({','.join('?' * len(message_ids))})""",
+            [WORKER_ID] + list(message_ids)
+        )
+        conn.commit()
+    finally:
+        release_db(conn)
+
+def process_inbound_message(from_number, message_body, message_sid=None):
+    """Apply the consent state machine to one queued message and send the reply"""
+    reply = process_sms_response(from_number, message_body, message_sid)
+    if reply:
+        queue_reply(from_number, reply)
+
+def inbound_consumer_loop():
+    """
+    Consumer thread: process queued inbound messages until the process shuts down
+    Delivery is at-least-once: a message that fails, or whose consumer dies
+    mid-message, stays leased and is processed again once the lease expires
+    """
+    while not _shutting_down.is_set():
+        try:
+            batch = claim_inbound_batch()
+        except Exception as e:
+            logger.error("Error claiming inbound messages: %s", e)
+            batch = []
+        
+        for position, (message_id, from_number, message_body, message_sid, attempts) in enumerate(batch):
+            if _shutting_down.is_set():
+                release_inbound([row[0] for row in batch[position:]])
+                break
+            try:
+                process_inbound_message(from_number, message_body, message_sid)
+            except Exception as e:
+                logger.exception("Error processing inbound message %s (attempt %d): %s", message_id, attempts, e)
+                try:
+                    if fail_inbound(message_id, attempts, str(e)):
+                        logger.error("Inbound message %s from %s failed %d times; giving up",
+                                     message_id, from_number, attempts)
+                except Exception as e:
+                    logger.error("Error recording failure of inbound message %s: %s", message_id, e)
+                continue
+            try:
+                complete_inbound(message_id)
+            except Exception as e:
+                # Hand it back rather than renew its lease forever; the SID check
+                # makes processing it again a no-op
+                logger.error("Error completing inbound message %s: %s", message_id, e)
+                try:
+                    release_inbound([message_id])
+                except Exception as e:
+                    logger.error("Error releasing inbound message %s: %s", message_id, e)
+        
+        if batch:
+            continue
+        _inbound_wakeup.wait(INBOUND_POLL_INTERVAL)
+        _inbound_wakeup.clear()
+
+def start_inbound_consumers():
+    """Start this process's inbound queue consumers (fast-ack mode only)"""
+    if WEBHOOK_INGEST_MODE != 'queue':
+        return
+    with _inbound_consumers_lock:
+        if _inbound_consumers:
+            return
+        for i in range(INBOUND_CONSUMER_COUNT):
+            consumer = threading.Thread(target=inbound_consumer_loop, name=f"inbound-consumer-{i}", daemon=True)
+            consumer.start()
+            _inbound_consumers.append(consumer)
+        logger.info("Started %d inbound message consumers", INBOUND_CONSUMER_COUNT)
+
 @app.route('/webhook', methods=['POST'])
 def webhook():
     """Handle Twilio webhook"""
-    print(f"=== Webhook called at {datetime.now()} ===")
-    print(f"Request form data: {request.form}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Webhook request form data: %s", request.form.to_dict(), extra=SAMPLED)
     
     # Twilio sends the phone number in the 'From' field
     from_number = request.form.get('From')
     message_body = request.form.get('Body', '').strip()
     
-    print(f"From: {from_number}")
-    print(f"Message: {message_body}")
+    message_sid = request.form.get('MessageSid')
+    
+    logger.info("Inbound message", extra={"from_number": from_number, "body_length": len(message_body)})
+    
+    # A Twilio retry of a message we've already handled: answer it the same way
+    # again, without reprocessing or resending anything
+    if message_sid:
+        seen, reply = recent_inbound.lookup(message_sid)
+        if seen:
+            logger.info("Duplicate message %s from %s answered from cache", message_sid, from_number)
+            if WEBHOOK_INGEST_MODE == 'queue' or WEBHOOK_REPLY_MODE == 'queue':
+                reply = None
+            return build_twiml(reply), 200, {'Content-Type': 'text/xml'}
+    
+    if WEBHOOK_INGEST_MODE == 'queue':
+        if from_number and message_body:
+            try:
+                enqueue_inbound(from_number, message_body, message_sid)
+            except Exception as e:
+                # Not queued; a non-2xx answer makes Twilio try again
+                logger.exception("Error queueing message %s from %s: %s", message_sid, from_number, e)
+                return build_twiml(), 500, {'Content-Type': 'text/xml'}
+            # Committed, so a retry can be acknowledged without queueing it again
+            if message_sid:
+                recent_inbound.remember(message_sid, None)
+        return build_twiml(), 200, {'Content-Type': 'text/xml'}
+    
+    reply = None
     
     # Check if participant exists in database
     if from_number and message_body:
         # Process the response
-        process_sms_response(from_number, message_body)
-        print("Processing complete!")
+        try:
+            reply = process_sms_response(from_number, message_body, message_sid)
+        except Exception as e:
+            # Rolled back and not remembered, so a retry is processed again
+            logger.exception("Error processing message %s from %s: %s", message_sid, from_number, e)
+            return build_twiml(), 500, {'Content-Type': 'text/xml'}
+        if message_sid:
+            recent_inbound.remember(message_sid, reply)
+    
+    if reply and WEBHOOK_REPLY_MODE == 'queue':
+        queue_reply(from_number, reply)
+        reply = None
     
     # Return TwiML response
-    return '<?xml version="1.0" encoding="UTF-8"?><Response></Response>', 200, {'Content-Type': 'text/xml'}
+    return build_twiml(reply), 200, {'Content-Type': 'text/xml'}
     
+@app.route('/status_callback', methods=['POST'])
+def status_callback():
+    """Handle a Twilio delivery receipt (StatusCallback)"""
+    message_sid = request.form.get('MessageSid')
+    message_status = request.form.get('MessageStatus')
+    if not message_sid or not message_status:
+        return '', 400
+    
+    delivery_receipt_writer.add([
+        message_sid,
+        message_status,
+        request.form.get('ErrorCode'),
+        request.form.get('To'),
+        datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    ])
+    return '', 204
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
     return {
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'database': os.path.exists(DB_PATH)
+        'database': os.path.exists(DB_PATH),
+        'participant_cache': participant_cache.stats()
     }
 
 @app.route('/send_consent', methods=['POST'])
@@ -934,17 +3369,20 @@ def send_consent_endpoint():
     phone_number = request.form.get('phone_number')
     if phone_number:
         # Ensure participant exists in database before sending
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         try:
+            phone_e164 = to_e164(phone_number)
             cursor.execute(
-                "INSERT OR IGNORE INTO participants (phone_number) VALUES (?)",
-                (phone_number,)
+                "INSERT OR IGNORE INTO participants (phone_number, phone_e164) VALUES (?, ?)",
+                (phone_number, phone_e164)
             )
             conn.commit()
-            print(f"Participant {phone_number} added to database")
+            if cursor.rowcount:
+                participant_cache.put(phone_e164, cursor.lastrowid, phone_number, 'pending', None)
+            logger.debug("Participant %s added to database", phone_number)
         finally:
-            conn.close()
+            release_db(conn)
         
         results = send_consent_request([phone_number])
         if phone_number in results["success"]:
@@ -971,48 +3409,41 @@ def upload_csv():
         return jsonify({"status": "error", "message": "File must be a CSV"}), 400
     
     try:
-        # Read the file content
-        file_content = file.read()
-        
-        # Process the CSV file
-        result = process_csv_file(file_content)
+        # Stream the upload straight into the database, tagging rows with this upload
+        upload_id = uuid.uuid4().hex
+        result = process_csv_file(file.stream, upload_id=upload_id)
         
         if result["status"] == "error":
+            if result.get("stored_successfully"):
+                result["upload_id"] = upload_id
             return jsonify(result), 400
         
-        # Store participants with their data in the database
-        store_results = store_participants_with_data(result["participants_data"])
+        response = {
+            "status": "success",
+            "upload_id": upload_id,
+            "total_participants": result["total"],
+            "inserted": result["inserted"],
+            "updated": result["updated"],
+            "duplicate_rows": result["duplicate_rows"],
+            "invalid_rows": result["invalid_rows"],
+            "stored_successfully": result["stored_successfully"],
+            "storage_failures": result["storage_failures"],
+            "storage_failures_detail": result["storage_failures_detail"],
+            "preview": result["preview"]
+        }
         
         # Check if we should send consent requests immediately
         send_immediately = request.form.get('send_immediately') == 'true'
         
-        if send_immediately and result["participants_data"]:
-            # Extract just phone numbers for sending consent requests
-            phone_numbers = [p['phone_number'] for p in result["participants_data"]]
-            send_results = send_consent_request(phone_numbers)
-            
-            return jsonify({
-                "status": "success",
-                "message": f"Processed CSV with additional data and sent consent requests",
-                "total_participants": result["total"],
-                "stored_successfully": len(store_results["success"]),
-                "storage_failures": len(store_results["failed"]),
-                "successful_sends": len(send_results["success"]),
-                "failed_sends": len(send_results["failed"]),
-                "send_failures": send_results["failed"],
-                "storage_failures_detail": store_results["failed"]
-            })
+        if send_immediately and result["total"]:
+            job_id = enqueue_job("consent", {"upload_id": upload_id}, result["total"])
+            response["message"] = "Processed CSV with additional data and queued consent requests"
+            response["job_id"] = job_id
+            return jsonify(response), 202
         
         # Just return the processing results
-        return jsonify({
-            "status": "success",
-            "message": f"Successfully processed CSV and stored {len(store_results['success'])} participants with additional data",
-            "total_participants": result["total"],
-            "stored_successfully": len(store_results["success"]),
-            "storage_failures": len(store_results["failed"]),
-            "participants_data": result["participants_data"],  # For preview
-            "storage_failures_detail": store_results["failed"]
-        })
+        response["message"] = f"Successfully processed CSV and stored {result['stored_successfully']} participants with additional data"
+        return jsonify(response)
     
     except Exception as e:
         return jsonify({"status": "error", "message": f"Error processing file: {str(e)}"}), 500
@@ -1021,6 +3452,21 @@ def upload_csv():
 def send_bulk_consent():
     """Send consent requests to a list of phone numbers"""
     data = request.get_json()
+    
+    # Everyone from a previous CSV upload
+    if data and data.get('upload_id'):
+        total = count_upload_participants(data['upload_id'])
+        if not total:
+            return jsonify({"status": "error", "message": "No participants found for this upload"}), 400
+        
+        job_id = enqueue_job("consent", {"upload_id": data['upload_id']}, total)
+        return jsonify({
+            "status": "success",
+            "message": "Consent requests queued",
+            "job_id": job_id,
+            "total_numbers": total
+        }), 202
+    
     if not data or 'phone_numbers' not in data or not isinstance(data['phone_numbers'], list):
         return jsonify({"status": "error", "message": "Phone numbers list required"}), 400
     
@@ -1028,17 +3474,15 @@ def send_bulk_consent():
     if not phone_numbers:
         return jsonify({"status": "error", "message": "Phone numbers list is empty"}), 400
     
-    # Send consent requests
-    results = send_consent_request(phone_numbers)
+    # Queue consent requests for the background workers
+    job_id = enqueue_job("consent", {"phone_numbers": phone_numbers}, len(phone_numbers))
     
     return jsonify({
         "status": "success",
-        "message": f"Consent requests sent",
-        "total_numbers": len(phone_numbers),
-        "successful_sends": len(results["success"]),
-        "failed_sends": len(results["failed"]),
-        "failures": results["failed"]
-    })
+        "message": "Consent requests queued",
+        "job_id": job_id,
+        "total_numbers": len(phone_numbers)
+    }), 202
 
 @app.route('/send_survey', methods=['POST'])
 def send_survey_endpoint():
@@ -1049,56 +3493,78 @@ def send_survey_endpoint():
     if not survey_url:
         return {'status': 'error', 'message': 'Survey URL required'}, 400
     
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    # Count consented participants who haven't been sent this survey
+    campaign_id = get_or_create_campaign(survey_url)
     
-    # Get consented participants who haven't been sent this survey
-    cursor.execute(
-        "SELECT phone_number FROM participants WHERE consent_status = 'consented' AND survey_sent = 0"
-    )
-    participants = cursor.fetchall()
-    conn.close()
+    # A repeated click while the survey is still going out joins the running job.
+    # Even if two jobs do start, recipient leases keep them from overlapping
+    active_job_id = find_active_job("survey", survey_url)
+    if active_job_id:
+        return {
+            'status': 'success',
+            'message': 'This survey is already being sent',
+            'job_id': active_job_id,
+            'campaign_id': campaign_id
+        }, 202
     
-    if not participants:
+    pending_count = count_campaign_pending(campaign_id)
+    
+    if not pending_count:
         return {'status': 'success', 'message': 'No consented participants found to send survey to'}
     
-    # Format the message properly - ALWAYS include the survey URL
-    if custom_message and custom_message.strip():
-        # If custom message provided, append the survey URL
-        message = f"{custom_message.strip()} {survey_url}"
-    else:
-        # Default message with survey URL
-        message = f"Hi! Here's your survey link: {survey_url} Thank you for participating!"
-    
-    success_count = 0
-    failed_count = 0
-    
-    for (phone,) in participants:
-        if send_sms(phone, message):
-            success_count += 1
-            # Mark as survey sent
-            conn = sqlite3.connect(DB_PATH)
-            cursor = conn.cursor()
-            try:
-                cursor.execute(
-                    "UPDATE participants SET survey_sent = 1 WHERE phone_number = ?",
-                    (phone,)
-                )
-                conn.commit()
-            except Exception as e:
-                print(f"Error updating survey_sent status for {phone}: {e}")
-            finally:
-                conn.close()
-        else:
-            failed_count += 1
-        
-        import time
-        time.sleep(1)  # Rate limiting
+    # Queue the survey for the background workers
+    job_id = enqueue_job(
+        "survey",
+        {"survey_url": survey_url, "custom_message": custom_message},
+        pending_count
+    )
     
     return {
         'status': 'success', 
-        'message': f'Survey sent to {success_count} participants. {failed_count} failed.'
-    }
+        'message': f'Survey queued for {pending_count} participants',
+        'job_id': job_id,
+        'campaign_id': campaign_id
+    }, 202
+
+@app.route('/search', methods=['GET'])
+def search_text_endpoint():
+    """
+    Full-text search
+    Query parameters: q, scope (responses or participants), limit, offset,
+    raw=1 to pass q through as FTS5 query syntax
+    """
+    text = request.args.get('q', '').strip()
+    scope = request.args.get('scope', 'responses')
+    if scope not in TEXT_SEARCH_SCOPES:
+        return jsonify({
+            "status": "error",
+            "message": f"Unknown scope: {scope}"
+        }), 400
+    
+    try:
+        limit = min(max(int(request.args.get('limit', TEXT_SEARCH_PAGE_SIZE)), 1), TEXT_SEARCH_MAX_PAGE_SIZE)
+        offset = max(int(request.args.get('offset', 0)), 0)
+        raw = request.args.get('raw', '').lower() in ('1', 'true', 'yes')
+        
+        page = search_text(text, scope=scope, limit=limit, offset=offset, raw=raw)
+        return jsonify({
+            "status": "success",
+            "scope": scope,
+            "results": page["results"],
+            "count": len(page["results"]),
+            "next_offset": page["next_offset"]
+        })
+    
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    except RuntimeError as e:
+        return jsonify({"status": "error", "message": str(e)}), 503
+    
+    except Exception as e:
+        logger.exception("Error in text search: %s", e)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
 @app.route('/search_participants', methods=['POST'])
 def search_participants_endpoint():
     """Search participants based on filters"""
@@ -1126,11 +3592,19 @@ def search_participants_endpoint():
 
 @app.route('/filter_options', methods=['GET'])
 def get_filter_options_endpoint():
-    """Get available filter options"""
+    """Get available filter options; answers 304 when the client's copy is current"""
     try:
-        result = get_filter_options()
-        return jsonify(result)
+        options, etag = filter_options_cache.get()
+        response = jsonify({
+            "status": "success",
+            "options": options
+        })
+        response.set_etag(etag)
+        # Let browsers keep the options but revalidate them on every load
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
     except Exception as e:
+        logger.exception("Error getting filter options: %s", e)
         return jsonify({
             "status": "error",
             "message": str(e),
@@ -1153,15 +3627,18 @@ def send_targeted_survey_endpoint():
         if not phone_numbers:
             return jsonify({"status": "error", "message": "No participants selected"}), 400
         
-        results = send_targeted_survey(survey_url, phone_numbers, custom_message)
+        job_id = enqueue_job(
+            "targeted_survey",
+            {"survey_url": survey_url, "phone_numbers": phone_numbers, "custom_message": custom_message},
+            len(phone_numbers)
+        )
         
         return jsonify({
             "status": "success",
-            "message": f"Survey sent to {len(results['success'])} participants",
-            "successful_sends": len(results['success']),
-            "failed_sends": len(results['failed']),
-            "failures": results['failed']
-        })
+            "message": f"Survey queued for {len(phone_numbers)} participants",
+            "job_id": job_id,
+            "total_numbers": len(phone_numbers)
+        }), 202
         
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -1181,11 +3658,8 @@ def mass_sms_upload():
         return jsonify({"status": "error", "message": "File must be a CSV"}), 400
     
     try:
-        # Read the file content
-        file_content = file.read()
-        
-        # Process the CSV file
-        result = process_mass_sms_csv(file_content)
+        # Process the CSV file straight from the upload stream
+        result = process_mass_sms_csv(file.stream)
         
         if result["status"] == "error":
             return jsonify(result), 400
@@ -1216,21 +3690,32 @@ def send_mass_sms_endpoint():
         if not message or not message.strip():
             return jsonify({"status": "error", "message": "Message cannot be empty"}), 400
         
-        # Send the mass SMS
-        results = send_mass_sms(phone_numbers, message)
-        
-        # Remove this problematic check since results now always has status
-        # if results["status"] == "error":
-        #     return jsonify(results), 400
+        # Queue the mass SMS for the background workers
+        job_id = enqueue_job(
+            "mass_sms",
+            {"phone_numbers": phone_numbers, "message": message},
+            len(phone_numbers)
+        )
         
         return jsonify({
             "status": "success",
-            "message": f"Mass SMS sent to {len(results['success'])} recipients",
-            "successful_sends": len(results['success']),
-            "failed_sends": len(results['failed']),
-            "failures": results['failed']
-        })
+            "message": f"Mass SMS queued for {len(phone_numbers)} recipients",
+            "job_id": job_id,
+            "total_numbers": len(phone_numbers)
+        }), 202
+        
+    except Exception as e:
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Report progress of a queued send job"""
+    try:
+        job = get_job(job_id)
+        if not job:
+            return jsonify({"status": "error", "message": "Job not found"}), 404
         
+        return jsonify({"status": "success", "job": job})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
@@ -1238,32 +3723,53 @@ def send_mass_sms_endpoint():
 def clear_database():
     """Clear all data from the database"""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
         # Delete all participants
         cursor.execute("DELETE FROM participants")
         # Delete all responses  
         cursor.execute("DELETE FROM responses")
+        # Delivery records point at the deleted participants
+        cursor.execute("DELETE FROM campaign_recipients")
         # Reset auto-increment counters
         cursor.execute("DELETE FROM sqlite_sequence WHERE name='participants'")
         cursor.execute("DELETE FROM sqlite_sequence WHERE name='responses'")
+        bump_data_version(cursor, 'participants')
         
         conn.commit()
+        participant_cache.clear()
         return {'status': 'success', 'message': 'Database cleared successfully'}
     except Exception as e:  
         return {'status': 'error', 'message': 'Error clearing database: ' + str(e)}, 500
     finally:
         if 'conn' in locals():
-            conn.close()
+            release_db(conn)
 
 @app.route('/reset_survey_status', methods=['POST'])
 def reset_survey_status():
-    """Reset survey_sent status for all participants"""
+    """
+    Make surveys sendable again
+    With a survey_url (JSON or form), only that campaign's delivery records are
+    cleared; without one, every campaign and the survey_sent flags are reset
+    """
+    data = request.get_json(silent=True) or request.form
+    survey_url = data.get('survey_url')
+    
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_db()
         cursor = conn.cursor()
         
+        if survey_url:
+            cursor.execute('''
+                DELETE FROM campaign_recipients
+                WHERE campaign_id = (SELECT id FROM campaigns WHERE survey_url = ?)
+            ''', (survey_url,))
+            rows_affected = cursor.rowcount
+            conn.commit()
+            return {'status': 'success', 'message': f'Reset survey status for {rows_affected} participants of {survey_url}'}
+        
+        cursor.execute("DELETE FROM campaign_recipients")
         cursor.execute("UPDATE participants SET survey_sent = 0")
         rows_affected = cursor.rowcount
         conn.commit()
@@ -1272,105 +3778,260 @@ def reset_survey_status():
         return {'status': 'error', 'message': 'Error resetting survey status: ' + str(e)}, 500
     finally:
         if 'conn' in locals():
-            conn.close()
+            release_db(conn)
 
-@app.route('/export_data', methods=['GET'])
-def export_data():
-    """Export all data to a CSV file"""
+# Streaming export
+EXPORT_SECTIONS = {
+    # section name -> (heading, table, date column)
+    'participants': ('## PARTICIPANTS', 'participants', 'created_at'),
+    'responses': ('## RESPONSES', 'responses', 'timestamp'),
+}
+EXPORT_FETCH_SIZE = 1000
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+def iter_export_csv(sections, start=None, end=None):
+    """
+    Yield the export CSV in chunks of roughly EXPORT_CHUNK_BYTES
+    Rows are pulled from the cursor EXPORT_FETCH_SIZE at a time, so memory use
+    doesn't grow with the table. Every section is read from one snapshot.
+    """
+    conn = connect_db()
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Get all participants
-        cursor.execute("SELECT * FROM participants")
-        participants = cursor.fetchall()
-        participant_columns = [description[0] for description in cursor.description]
-        
-        # Get all responses
-        cursor.execute("SELECT * FROM responses")
-        responses = cursor.fetchall()
-        response_columns = [description[0] for description in cursor.description]
-        
-        conn.close()
-        
-        # Create a CSV in memory
+        conn.execute("BEGIN")
         output = io.StringIO()
         writer = csv.writer(output)
         
-        # Write participants section
-        writer.writerow(['## PARTICIPANTS'])
-        writer.writerow(participant_columns)
-        for row in participants:
-            writer.writerow(row)
-        
-        # Add a separator
-        writer.writerow([])
-        writer.writerow(['## RESPONSES'])
-        
-        # Write responses section
-        writer.writerow(response_columns)
-        for row in responses:
-            writer.writerow(row)
-        
-        # Prepare response
-        output.seek(0)
-        csv_data = output.getvalue()
-        
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"survey_data_{timestamp}.csv"
-        
-        # Return the CSV file as a downloadable attachment
-        return Response(
-            csv_data,
-            mimetype="text/csv",
-            headers={"Content-Disposition": f"attachment; filename={filename}"}
-        )
-    
+        for index, name in enumerate(sections):
+            heading, table, date_column = EXPORT_SECTIONS[name]
+            
+            conditions = []
+            params = []
+            if start:
+                conditions.append(f"{date_column} >= ?")
+                params.append(start)
+            if end:
+                # A bare date includes that whole day; a timestamp is used as is
+                if len(end) == 10:
+                    conditions.append(f"{date_column} < date(?, '+1 day')")
+                else:
+                    conditions.append(f"{date_column} <= ?")
+                params.append(end)
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            
+            cursor = conn.execute(f"SELECT * FROM {table}{where}", params)
+            
+            if index:
+                writer.writerow([])
+            writer.writerow([heading])
+            writer.writerow([description[0] for description in cursor.description])
+            
+            while True:
+                rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                if output.tell() >= EXPORT_CHUNK_BYTES:
+                    yield output.getvalue()
+                    output.seek(0)
+                    output.truncate()
+        
+        if output.tell():
+            yield output.getvalue()
     except Exception as e:
-        print(f"Error exporting data: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"status": "error", "message": str(e)}), 500
+        # Headers are already sent, so all that's left is to log and cut the download short
+        logger.exception("Error exporting data: %s", e)
+        raise
+    finally:
+        conn.rollback()
+        conn.close()
+
+def gzip_chunks(chunks):
+    """Gzip a stream of text chunks on the fly"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+@app.route('/export_data', methods=['GET'])
+def export_data():
+    """
+    Stream participants and responses as a CSV download
+    Query parameters: sections (comma-separated, default all), start and end
+    (inclusive bounds: YYYY-MM-DD covers the whole day, or a full
+    YYYY-MM-DD HH:MM:SS timestamp), gzip=1 to compress the download
+    """
+    sections = [name.strip() for name in request.args.get('sections', '').split(',') if name.strip()]
+    sections = sections or list(EXPORT_SECTIONS)
+    unknown = [name for name in sections if name not in EXPORT_SECTIONS]
+    if unknown:
+        return jsonify({
+            "status": "error",
+            "message": f"Unknown sections: {', '.join(unknown)}"
+        }), 400
+    
+    start = request.args.get('start')
+    end = request.args.get('end')
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    
+    # Generate filename with timestamp
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"survey_data_{timestamp}.csv"
+    
+    body = iter_export_csv(sections, start, end)
+    mimetype = "text/csv"
+    if compress:
+        body = gzip_chunks(body)
+        mimetype = "application/gzip"
+        filename += ".gz"
+    
+    # No Content-Length, so the server sends it with chunked transfer encoding
+    return Response(
+        body,
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+# Participant listing
+PARTICIPANT_COLUMNS = [
+    'id', 'phone_number', 'phone_e164', 'consent_status', 'consent_timestamp', 'email',
+    'survey_sent', 'created_at', 'calltime', 'last_fed_vote_intent', 'gender', 'age',
+    'education', 'phone_type', 'region', 'notes', 'upload_id', 'age_num'
+]
+PARTICIPANTS_PAGE_SIZE = 100
+PARTICIPANTS_MAX_PAGE_SIZE = 1000
+
+# Query-string filters accepted by /participants, matched exactly
+PARTICIPANT_LIST_FILTERS = {
+    'consent_status': "consent_status = ?",
+    'gender': "gender = ? COLLATE NOCASE",
+    'region': "region = ? COLLATE NOCASE",
+    'education': "education = ? COLLATE NOCASE",
+    'phone_type': "phone_type = ? COLLATE NOCASE",
+    'upload_id': "upload_id = ?",
+    'created_after': "created_at >= ?",
+    'created_before': "created_at <= ?",
+}
+
+def encode_participant_cursor(created_at, participant_id):
+    """Opaque cursor pointing just past the given (created_at, id)"""
+    raw = json.dumps([created_at, participant_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_participant_cursor(cursor_token):
+    """Inverse of encode_participant_cursor; raises ValueError on a malformed cursor"""
+    try:
+        created_at, participant_id = json.loads(base64.urlsafe_b64decode(cursor_token.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(participant_id, int):
+        raise ValueError("Invalid cursor")
+    return created_at, participant_id
+
+def list_participants(fields=None, filters=None, cursor_token=None, limit=PARTICIPANTS_PAGE_SIZE, include_total=False):
+    """
+    Return one page of participants, newest first
+    Pages are keyed on (created_at, id), so each page is an index range scan
+    no matter how deep into the table it is
+    """
+    # Deduplicated in order, so the selected columns line up with the keys of each row
+    fields = list(dict.fromkeys(fields or PARTICIPANT_COLUMNS))
+    unknown = [field for field in fields if field not in PARTICIPANT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    # The cursor needs created_at and id from the last row even if they weren't requested
+    select_columns = list(dict.fromkeys(fields + ['created_at', 'id']))
+    
+    conditions = []
+    params = []
+    for name, value in (filters or {}).items():
+        if name == 'survey_sent':
+            conditions.append("survey_sent = ?")
+            params.append(1 if value else 0)
+        else:
+            conditions.append(PARTICIPANT_LIST_FILTERS[name])
+            params.append(value)
+    
+    conn = get_db()
+    cursor = conn.cursor()
+    
+    total = None
+    if include_total:
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor.execute(f"SELECT COUNT(*) FROM participants{where}", params)
+        total = cursor.fetchone()[0]
+    
+    page_conditions = list(conditions)
+    page_params = list(params)
+    if cursor_token:
+        page_conditions.append("(created_at, id) < (?, ?)")
+        page_params.extend(decode_participant_cursor(cursor_token))
+    where = f" WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+    
+    cursor.execute(f"""
+        SELECT {', '.join(select_columns)} FROM participants{where}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+    """, page_params + [limit + 1])
+    rows = cursor.fetchall()
+    
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    data = [dict(zip(fields, row)) for row in rows]
+    
+    next_cursor = None
+    if has_more:
+        last = dict(zip(select_columns, rows[-1]))
+        next_cursor = encode_participant_cursor(last['created_at'], last['id'])
+    
+    return {"data": data, "next_cursor": next_cursor, "total": total}
 
 @app.route('/participants')
 def participants():
-    """Get all participants with proper error handling"""
+    """
+    List participants a page at a time, newest first
+    Query parameters: cursor, limit, fields (comma-separated), include_total,
+    and any of the PARTICIPANT_LIST_FILTERS plus survey_sent
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        # Check if participants table exists
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='participants'")
-        if not cursor.fetchone():
-            return jsonify({
-                'status': 'success',
-                'data': [],
-                'message': 'No participants table found - database may be empty'
-            })
-        
-        cursor.execute("SELECT * FROM participants ORDER BY created_at DESC")
-        rows = cursor.fetchall()
-        
-        # Get column names
-        column_names = [description[0] for description in cursor.description]
-        
-        # Create a list of dictionaries
-        participants_list = []
-        for row in rows:
-            participant_dict = {}
-            for i, value in enumerate(row):
-                participant_dict[column_names[i]] = value
-            participants_list.append(participant_dict)
+        args = request.args
+        
+        fields = [f.strip() for f in args.get('fields', '').split(',') if f.strip()] or None
+        limit = min(max(int(args.get('limit', PARTICIPANTS_PAGE_SIZE)), 1), PARTICIPANTS_MAX_PAGE_SIZE)
+        include_total = args.get('include_total', '').lower() in ('1', 'true', 'yes')
+        
+        filters = {name: args[name] for name in PARTICIPANT_LIST_FILTERS if args.get(name)}
+        if args.get('survey_sent'):
+            filters['survey_sent'] = args['survey_sent'].lower() in ('1', 'true', 'yes')
+        
+        page = list_participants(
+            fields=fields,
+            filters=filters,
+            cursor_token=args.get('cursor'),
+            limit=limit,
+            include_total=include_total
+        )
         
-        return jsonify({
+        result = {
             'status': 'success',
-            'data': participants_list,
-            'count': len(participants_list)
-        })
+            'data': page['data'],
+            'count': len(page['data']),
+            'next_cursor': page['next_cursor']
+        }
+        if include_total:
+            result['total'] = page['total']
+        return jsonify(result)
+    
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e),
+            'data': []
+        }), 400
         
     except sqlite3.Error as e:
-        print(f"Database error in participants endpoint: {e}")
+        logger.error("Database error in participants endpoint: %s", e)
         return jsonify({
             'status': 'error',
             'message': f'Database error: {str(e)}',
@@ -1378,18 +4039,12 @@ def participants():
         }), 500
         
     except Exception as e:
-        print(f"General error in participants endpoint: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("General error in participants endpoint: %s", e)
         return jsonify({
             'status': 'error',
             'message': f'Server error: {str(e)}',
             'data': []
         }), 500
-        
-    finally:
-        if 'conn' in locals():
-            conn.close()
 
 @app.route('/')
 def dashboard():
@@ -1685,7 +4340,8 @@ def dashboard():
                     <button onclick="viewParticipants()">View All Participants</button>
                     <button onclick="exportData()">Export Data to CSV</button>
                 </div>
-                <div id="participantsTable" style="margin-top: 20px; display: none;">
+                <div id="participantsTable" style="margin-top: 20px; display: none; max-height: 500px; overflow-y: auto;">
+                    <div id="participantsSummary" style="margin-bottom: 10px;"></div>
                     <table>
                         <thead>
                             <tr style="background-color: #f8f9fa;">
@@ -1722,7 +4378,8 @@ def dashboard():
 
     <script>
         const API_BASE = window.location.origin;
-        let extractedPhoneNumbers = [];
+        let lastUploadId = null;
+        let lastUploadTotal = 0;
         let massSmsPhoneNumbers = [];
 
         function openTab(evt, tabName) {
@@ -1750,6 +4407,31 @@ def dashboard():
             }, 5000);
         }
 
+        async function waitForJob(jobId, onProgress) {
+            // Poll a queued send job until the background workers finish it
+            while (true) {
+                const response = await fetch(`${API_BASE}/jobs/${jobId}`);
+                const result = await response.json();
+                if (!response.ok) {
+                    throw new Error(result.message || 'Unable to fetch job status');
+                }
+                
+                const job = result.job;
+                if (onProgress) onProgress(job);
+                if (job.status === 'completed' || job.status === 'failed') {
+                    return job;
+                }
+                await new Promise(resolve => setTimeout(resolve, 2000));
+            }
+        }
+
+        function showJobProgress(job, label) {
+            const status = document.getElementById('status');
+            status.textContent = `${label}: ${job.processed} of ${job.total} processed (${job.successful_sends} sent, ${job.failed_sends} failed)`;
+            status.className = 'success';
+            status.style.display = 'block';
+        }
+
         async function sendConsent() {
             const phone = document.getElementById('phone').value;
             if (!phone) {
@@ -1791,9 +4473,12 @@ def dashboard():
                 
                 if (response.ok) {
                     if (sendImmediately) {
-                        showStatus(`Successfully sent consent requests to ${result.successful_sends} out of ${result.total_participants} phone numbers`, true);
+                        const job = await waitForJob(result.job_id, job => showJobProgress(job, 'Sending consent requests'));
+                        showStatus(`Successfully sent consent requests to ${job.successful_sends} out of ${result.total_participants} phone numbers`, job.status === 'completed');
                     } else {
-                        extractedPhoneNumbers = result.participants_data ? result.participants_data.map(p => p.phone_number) : [];
+                        lastUploadId = result.upload_id;
+                        lastUploadTotal = result.stored_successfully;
+                        const previewNumbers = result.preview ? result.preview.map(p => p.phone_number) : [];
                         
                         const previewArea = document.getElementById('previewArea');
                         const phonePreview = document.getElementById('phonePreview');
@@ -1801,17 +4486,22 @@ def dashboard():
                         
                         phonePreview.innerHTML = '';
                         
-                        if (extractedPhoneNumbers.length > 0) {
-                            extractedPhoneNumbers.forEach(phone => {
+                        if (previewNumbers.length > 0) {
+                            previewNumbers.forEach(phone => {
                                 const li = document.createElement('li');
                                 li.textContent = phone;
                                 phonePreview.appendChild(li);
                             });
+                            if (lastUploadTotal > previewNumbers.length) {
+                                const li = document.createElement('li');
+                                li.textContent = `... and ${lastUploadTotal - previewNumbers.length} more`;
+                                phonePreview.appendChild(li);
+                            }
                             previewControls.style.display = 'block';
                         }
                         
                         previewArea.style.display = 'block';
-                        showStatus(`Successfully extracted ${extractedPhoneNumbers.length} phone numbers from CSV`, true);
+                        showStatus(`Successfully extracted ${result.total_participants} phone numbers from CSV`, true);
                     }
                 } else {
                     showStatus(result.message || 'Error processing CSV file', false);
@@ -1822,7 +4512,7 @@ def dashboard():
         }
 
         async function sendConsentToPreview() {
-            if (!extractedPhoneNumbers || extractedPhoneNumbers.length === 0) {
+            if (!lastUploadId || !lastUploadTotal) {
                 showStatus('No phone numbers to send consent requests to', false);
                 return;
             }
@@ -1831,12 +4521,13 @@ def dashboard():
                 const response = await fetch(`${API_BASE}/send_bulk_consent`, {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ phone_numbers: extractedPhoneNumbers })
+                    body: JSON.stringify({ upload_id: lastUploadId })
                 });
                 const result = await response.json();
                 
                 if (response.ok) {
-                    showStatus(`Successfully sent consent requests to ${result.successful_sends} out of ${result.total_numbers} phone numbers`, true);
+                    const job = await waitForJob(result.job_id, job => showJobProgress(job, 'Sending consent requests'));
+                    showStatus(`Successfully sent consent requests to ${job.successful_sends} out of ${result.total_numbers} phone numbers`, job.status === 'completed');
                 } else {
                     showStatus(result.message || 'Error sending consent requests', false);
                 }
@@ -1977,8 +4668,12 @@ def dashboard():
         }
         
         if (response.ok && result.status === 'success') {
-            const successMsg = `Mass SMS sent successfully to ${result.successful_sends} recipients!`;
-            debugDiv.innerHTML += `Step 7: Showing success message: ${successMsg}<br>`;
+            debugDiv.innerHTML += `Step 7: Job ${result.job_id} queued, waiting for it to finish<br>`;
+            const job = await waitForJob(result.job_id, job => {
+                sendBtn.textContent = `📤 Sending... ${job.processed}/${job.total}`;
+            });
+            const successMsg = `Mass SMS sent successfully to ${job.successful_sends} recipients!`;
+            debugDiv.innerHTML += `Step 8: Showing success message: ${successMsg}<br>`;
             showStatus(successMsg, true);
             
             // Clear form
@@ -2039,55 +4734,104 @@ def dashboard():
                 });
                 
                 const result = await response.json();
-                showStatus(result.message, response.ok);
+                if (response.ok && result.job_id) {
+                    const job = await waitForJob(result.job_id, job => showJobProgress(job, 'Sending survey'));
+                    showStatus(`Survey sent to ${job.successful_sends} participants. ${job.failed_sends} failed.`, job.status === 'completed');
+                } else {
+                    showStatus(result.message, response.ok);
+                }
             } catch (error) {
                 showStatus('Error sending survey: ' + error.message, false);
             }
         }
 
+        // Participants are fetched a page at a time as the table is scrolled
+        const PARTICIPANT_LIST_FIELDS = 'phone_number,consent_status,email,survey_sent,calltime,last_fed_vote_intent,gender,age,education,phone_type,region,notes';
+        let participantsCursor = null;
+        let participantsLoading = false;
+        let participantsLoaded = 0;
+
         async function viewParticipants() {
+            participantsCursor = null;
+            participantsLoaded = 0;
+            document.getElementById('participantsBody').innerHTML = '';
+            document.getElementById('participantsTable').style.display = 'block';
+            document.getElementById('participantsTable').scrollTop = 0;
+            
+            if (await loadParticipantsPage(true)) {
+                showStatus('Participants loaded successfully', true);
+            }
+        }
+
+        async function loadParticipantsPage(first) {
+            if (participantsLoading || (!first && !participantsCursor)) {
+                return false;
+            }
+            participantsLoading = true;
+            
             try {
-                const response = await fetch(`${API_BASE}/participants`);
+                const params = new URLSearchParams({fields: PARTICIPANT_LIST_FIELDS, limit: '100'});
+                if (first) {
+                    params.set('include_total', '1');
+                } else {
+                    params.set('cursor', participantsCursor);
+                }
+                const response = await fetch(`${API_BASE}/participants?${params}`);
                 const result = await response.json();
                 
-                if (result.status === 'success') {
-                    const tbody = document.getElementById('participantsBody');
-                    tbody.innerHTML = '';
-                    
-                    if (result.data && result.data.length > 0) {
-                        result.data.forEach(participant => {
-                            const row = tbody.insertRow();
-                            row.insertCell(0).textContent = participant.phone_number;
-                            row.insertCell(1).textContent = participant.consent_status;
-                            row.insertCell(2).textContent = participant.email || 'N/A';
-                            row.insertCell(3).textContent = participant.survey_sent ? 'Yes' : 'No';
-                            
-                            const additionalCell = row.insertCell(4);
-                            const viewButton = document.createElement('button');
-                            viewButton.textContent = 'View Data';
-                            viewButton.style.padding = '5px 10px';
-                            viewButton.style.fontSize = '12px';
-                            viewButton.onclick = () => showAdditionalData(participant);
-                            additionalCell.appendChild(viewButton);
-                        });
-                    } else {
-                        const row = tbody.insertRow();
-                        const cell = row.insertCell(0);
-                        cell.colSpan = 5;
-                        cell.textContent = 'No participants found';
-                        cell.style.textAlign = 'center';
-                    }
-                    
-                    document.getElementById('participantsTable').style.display = 'block';
-                    showStatus('Participants loaded successfully', true);
-                } else {
+                if (result.status !== 'success') {
                     showStatus('Error loading participants', false);
+                    return false;
+                }
+                
+                const tbody = document.getElementById('participantsBody');
+                if (first && result.data.length === 0) {
+                    const row = tbody.insertRow();
+                    const cell = row.insertCell(0);
+                    cell.colSpan = 5;
+                    cell.textContent = 'No participants found';
+                    cell.style.textAlign = 'center';
+                }
+                
+                result.data.forEach(participant => {
+                    const row = tbody.insertRow();
+                    row.insertCell(0).textContent = participant.phone_number;
+                    row.insertCell(1).textContent = participant.consent_status;
+                    row.insertCell(2).textContent = participant.email || 'N/A';
+                    row.insertCell(3).textContent = participant.survey_sent ? 'Yes' : 'No';
+                    
+                    const additionalCell = row.insertCell(4);
+                    const viewButton = document.createElement('button');
+                    viewButton.textContent = 'View Data';
+                    viewButton.style.padding = '5px 10px';
+                    viewButton.style.fontSize = '12px';
+                    viewButton.onclick = () => showAdditionalData(participant);
+                    additionalCell.appendChild(viewButton);
+                });
+                
+                participantsCursor = result.next_cursor;
+                participantsLoaded += result.data.length;
+                if (first) {
+                    document.getElementById('participantsTable').dataset.total = result.total;
                 }
+                const total = document.getElementById('participantsTable').dataset.total;
+                document.getElementById('participantsSummary').textContent = `Showing ${participantsLoaded} of ${total} participants`;
+                return true;
             } catch (error) {
                 showStatus('Error fetching participants: ' + error.message, false);
+                return false;
+            } finally {
+                participantsLoading = false;
             }
         }
 
+        document.getElementById('participantsTable').addEventListener('scroll', (e) => {
+            const table = e.target;
+            if (table.scrollTop + table.clientHeight >= table.scrollHeight - 200) {
+                loadParticipantsPage(false);
+            }
+        });
+
         function showAdditionalData(participant) {
             const modal = document.createElement('div');
             modal.style.cssText = 'position:fixed;top:0;left:0;width:100%;height:100%;background:rgba(0,0,0,0.5);display:flex;justify-content:center;align-items:center;z-index:1000';
@@ -2207,9 +4951,135 @@ def dashboard():
 </body>
 </html>'''
 
-if __name__ == '__main__':
-    # Initialize database
+# ---------------------------------------------------------------------------
+# Serving
+#
+# python app.py runs Flask's development server in one process. In production
+# the app is served by gunicorn (see gunicorn.conf.py and wsgi.py): the master
+# calls prepare_database() once, each forked worker gets fresh connections,
+# HTTP client and threads, and shutdown_app() drains sends when a worker exits.
+# ---------------------------------------------------------------------------
+
+JOB_DRAIN_TIMEOUT = float(os.getenv('JOB_DRAIN_TIMEOUT', 20))
+
+_database_prepared = False
+
+def prepare_database():
+    """
+    One-time startup work: schema migrations, crash recovery of the send log
+    and requeueing interrupted jobs. Run it in exactly one process before any
+    worker starts sending
+    """
+    global _database_prepared
+    if _database_prepared:
+        return
     init_database()
+    replay_send_logs()
+    migrate_legacy_survey_sent()
+    requeue_interrupted_jobs()
+    # The master's own connection must not be inherited by forked workers
+    close_db()
+    _database_prepared = True
+
+def create_app(start_workers=True):
+    """
+    WSGI application factory
+    Prepares the database unless a parent process already did, warms this
+    process's participant cache and starts its send job workers and inbound
+    queue consumers
+    """
+    prepare_database()
+    # A worker respawned after a crash picks up its predecessor's send log
+    # right away, well before that worker's leases expire
+    replay_send_logs()
+    warm_participant_cache()
+    if start_workers:
+        start_job_workers()
+        start_inbound_consumers()
+        resume_pending_replies()
+    return app
+
+def reset_after_fork():
+    """
+    Rebuild per-process state in a forked child: SQLite connections, the
+    pooled Twilio session, thread pools, locks and the logging thread can't
+    be shared with the parent
+    """
+    global _db_local, twilio_client, _send_executor
+    global _send_executor_lock, _job_workers, _job_workers_lock, _job_wakeup
+    global _shutting_down, _log_listener, filter_options_cache
+    global WORKER_ID, _active_recipient_leases, _active_recipient_leases_lock
+    global _inbound_consumers, _inbound_consumers_lock, _inbound_wakeup, recent_inbound
+    global participant_cache
+    
+    _db_local = threading.local()
+    WORKER_ID = make_worker_id()
+    _active_recipient_leases = set()
+    _active_recipient_leases_lock = threading.Lock()
+    twilio_client = TwilioClient.from_env()
+    _send_executor = None
+    _send_executor_lock = threading.Lock()
+    _job_workers = []
+    _job_workers_lock = threading.Lock()
+    _job_wakeup = threading.Event()
+    _inbound_consumers = []
+    _inbound_consumers_lock = threading.Lock()
+    _inbound_wakeup = threading.Event()
+    recent_inbound = RecentMessageCache(INBOUND_DEDUP_CACHE_SIZE)
+    participant_cache = ParticipantCache(PARTICIPANT_CACHE_SIZE)
+    _shutting_down = threading.Event()
+    filter_options_cache = FilterOptionsCache()
+    
+    # Each process appends to its own send log; replay_send_logs picks them all up
+    survey_status_writer.reset_after_fork(f"{SURVEY_SEND_LOG_PATH}.{os.getpid()}")
+    delivery_receipt_writer.reset_after_fork()
+    outbound_message_writer.reset_after_fork()
+    
+    # The parent's log writer thread doesn't exist in the child
+    _log_listener = None
+    logger.handlers.clear()
+    logger.filters.clear()
+    setup_logging()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_after_fork)
+
+def shutdown_app(timeout=JOB_DRAIN_TIMEOUT):
+    """
+    Graceful shutdown: stop taking new recipients and inbound messages, let
+    in-flight work finish and record it (interrupted jobs are requeued at
+    their saved offset, unprocessed inbound messages and unsent auto-replies
+    go back to the queue), then flush the buffered writers
+    """
+    _shutting_down.set()
+    _job_wakeup.set()
+    _inbound_wakeup.set()
+    
+    deadline = time.monotonic() + timeout
+    for worker in list(_job_workers) + list(_inbound_consumers):
+        worker.join(max(0, deadline - time.monotonic()))
+    
+    # Bulk sends are rate limited before they reach the pool, so what's left
+    # is HTTP requests already under way and auto-replies; replies that
+    # haven't gone out yet are released for the next process to send
+    if _send_executor is not None:
+        _send_executor.shutdown(wait=True, cancel_futures=True)
+    try:
+        release_pending_replies()
+    except Exception as e:
+        logger.error("Error releasing auto-replies: %s", e)
+    
+    survey_status_writer.close()
+    delivery_receipt_writer.close()
+    outbound_message_writer.close()
+    if twilio_client is not None:
+        twilio_client.close()
+    logger.info("Shutdown complete")
+
+if __name__ == '__main__':
+    # Migrate the schema, recover the send log and start draining the send
+    # queue (resumes jobs interrupted by a restart)
+    create_app()
     
     # Get port from environment (for cloud deployment)
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,54 @@
+"""
+gunicorn settings for the SMS webhook
+
+Worker tuning
+-------------
+Webhook requests are short: a SQLite lookup and write, then a TwiML reply.
+Throughput scales with processes up to about one per core. SQLite allows
+one writer at a time, so processes beyond the core count mostly queue on the
+write lock. Threads per worker cover the time spent waiting on the database
+and on Twilio.
+
+    WEB_CONCURRENCY    worker processes (default: number of cores)
+    GUNICORN_THREADS   threads per worker (default: 8)
+    JOB_WORKERS        send job threads per worker process (see app.py)
+    INBOUND_CONSUMERS  inbound queue threads per worker process, used when
+                       WEBHOOK_INGEST_MODE=queue
+
+Every worker also drains the send queue. Jobs are claimed atomically, so
+workers never pick up the same job, and all workers share one rate limiter
+(kept in the database), so the total stays at SMS_RATE_PER_SECOND however
+the sends are spread between them.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+# Long enough for JOB_DRAIN_TIMEOUT plus one Twilio read timeout
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 45))
+keepalive = 5
+
+# on_starting imports app in the master for the one-time database work, and
+# workers inherit that module; app.reset_after_fork (registered with
+# os.register_at_fork) rebuilds its per-process state in each worker. The WSGI
+# app itself (wsgi.py, which calls create_app and starts the job threads) is
+# loaded in each worker, not preloaded in the master.
+preload_app = False
+
+
+def on_starting(server):
+    """Migrate the schema and recover interrupted work once, in the master"""
+    import app
+    app.prepare_database()
+
+
+def worker_exit(server, worker):
+    """Stop taking recipients, drain in-flight sends and flush buffered writes"""
+    import app
+    app.shutdown_app()
@@ -0,0 +1,118 @@
+"""
+Benchmark: per-row cost of CSV column resolution on a synthetic panel file.
+
+Compares the original per-row lookup (DictReader plus a scan over every
+mapping variation and header for every row) with the compiled CsvPlan used
+by process_csv_file. Database writes are not included.
+
+Usage:
+    python scripts/bench_csv_plan.py [--rows 1000000]
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import app
+
+HEADERS = ['Phone Number', 'CallTime', 'LastFedVoteIntent', 'Gender', 'Age',
+           'Education', 'PhoneType', 'Region', 'Notes', 'Interviewer', 'Weight']
+
+
+def write_synthetic_csv(path, rows):
+    rng = random.Random(42)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        for i in range(rows):
+            writer.writerow([
+                f"613{i:07d}",
+                f"2024-05-{rng.randint(1, 28):02d} 18:{rng.randint(0, 59):02d}",
+                rng.choice(['LPC', 'CPC', 'NDP', 'BQ', 'GPC', 'Undecided']),
+                rng.choice(['Male', 'Female', 'Other']),
+                str(rng.randint(18, 90)),
+                rng.choice(['High school', 'College', 'University', 'Postgraduate']),
+                rng.choice(['Cell', 'Landline']),
+                rng.choice(['Ontario', 'Quebec', 'BC', 'Alberta', 'Atlantic', 'Prairies']),
+                rng.choice(['', 'callback', 'N/A', 'prefers evenings']),
+                f"int{rng.randint(1, 40)}",
+                f"{rng.random():.4f}",
+            ])
+
+
+def legacy_rows(path):
+    """The original process_csv_file row loop, minus logging"""
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        phone_column = next(
+            (field for field in fieldnames
+             if field.lower().strip() == 'phone_number'
+             or any(k in field.lower().strip() for k in app.PHONE_COLUMN_KEYWORDS)),
+            fieldnames[0]
+        )
+        for row in reader:
+            phone_value = str(row.get(phone_column, '')).strip()
+            if not phone_value or not app.is_valid_phone_number(phone_value):
+                continue
+            participant_data = {'phone_number': app.normalize_phone_number(phone_value)}
+            for db_column, csv_variations in app.CSV_COLUMN_MAPPING.items():
+                value = None
+                for csv_col in csv_variations:
+                    if csv_col in row:
+                        value = str(row[csv_col]).strip()
+                        break
+                    for actual_col in fieldnames:
+                        if actual_col.lower() == csv_col.lower():
+                            value = str(row[actual_col]).strip()
+                            break
+                    if value:
+                        break
+                if value and value.lower() not in ['', 'null', 'none', 'n/a']:
+                    participant_data[db_column] = value
+            yield participant_data
+
+
+def planned_rows(path):
+    """The compiled-plan row loop used by process_csv_file"""
+    stats = {"rows": 0, "valid": 0, "invalid": 0}
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        headers = next(reader)
+        yield from app.iter_csv_participants(reader, headers, stats)
+
+
+def measure(label, rows_fn, path, rows):
+    start = time.perf_counter()
+    count = 0
+    checksum = 0
+    for participant in rows_fn(path):
+        count += 1
+        checksum += len(participant)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<22} {elapsed:8.2f} s   {elapsed / rows * 1e6:7.2f} us/row   ({count} rows, {checksum} fields)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'panel.csv')
+        write_synthetic_csv(path, args.rows)
+        print(f"Synthetic CSV: {args.rows} rows, {os.path.getsize(path) / 1e6:.1f} MB")
+
+        legacy = measure("legacy per-row lookup", legacy_rows, path, args.rows)
+        planned = measure("compiled plan", planned_rows, path, args.rows)
+        print(f"speedup: {legacy / planned:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
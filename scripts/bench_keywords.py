@@ -0,0 +1,77 @@
+"""
+Benchmark: per-message cost of classifying inbound replies.
+
+Compares the original if/elif chain from process_sms_response (exact string
+comparisons plus an uncompiled email regex evaluated twice) with the
+KeywordEngine used today, over a corpus of reply strings as panelists
+actually send them. Database writes are not included.
+
+Usage:
+    python scripts/bench_keywords.py [--messages 1000000]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import app
+
+# Replies seen in the wild, in rough proportion: mostly keywords with stray
+# case and punctuation, some addresses, and a tail of free text
+CORPUS = [
+    "YES", "Yes", "yes", "Yes!", "yes.", " YES ", "Y", "y", "Yep", "ok", "Okay", "Sure!",
+    "STOP", "Stop", "stop", "STOP.", "Stop!!", "NO", "No", "no", "No thanks", "N",
+    "UNSUBSCRIBE", "Unsubscribe", "cancel", "END", "quit", "STOPALL", "Stop all",
+    "START", "HELP", "help", "Info",
+    "Oui", "oui!", "NON", "Non merci", "Arrêt", "ARRET",
+    "EMAIL jane.doe@example.com", "Email: john_smith@mail.ca", "j.tremblay@videotron.qc.ca",
+    "my email is pat.lee+panel@gmail.com thanks", "EMAIL", "email",
+    "Who is this?", "Wrong number", "What survey is this for?", "Call me later please",
+    "I already did the survey last week", "\U0001F44D", "Liked “Reply YES to consent”",
+    "yes but only on weekends", "Can you send it to my wife instead",
+]
+
+
+def legacy_classify(message_body):
+    """The original branch selection in process_sms_response"""
+    message_upper = message_body.strip().upper()
+    if message_upper == "YES":
+        return 'consent', None
+    elif message_upper in ["NO", "STOP"]:
+        return 'opt_out', None
+    elif message_upper.startswith("EMAIL") or re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', message_body):
+        email_match = re.search(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', message_body)
+        return 'email', email_match.group() if email_match else None
+    return 'unknown', None
+
+
+def measure(label, classify, messages):
+    intents = Counter()
+    start = time.perf_counter()
+    for message in messages:
+        intents[classify(message)[0]] += 1
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16} {elapsed:7.2f} s   {elapsed / len(messages) * 1e6:6.3f} us/msg   {dict(sorted(intents.items()))}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    messages = (CORPUS * (args.messages // len(CORPUS) + 1))[:args.messages]
+    engine = app.KeywordEngine.from_config()
+    print(f"Classifying {len(messages)} messages ({len(CORPUS)} distinct), languages: {', '.join(app.KEYWORD_LANGUAGES)}")
+
+    legacy = measure("legacy chain", legacy_classify, messages)
+    current = measure("KeywordEngine", engine.classify, messages)
+    print(f"speedup: {legacy / current:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Micro-benchmark: per-message latency of send_sms against a local stub server.
+
+Compares the original implementation (module-level requests.post, env vars
+read on every call, new connection per message) with the pooled
+TwilioClient used by app.send_sms today.
+
+Usage:
+    python scripts/bench_send_sms.py [--messages 500]
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+class StubTwilioHandler(BaseHTTPRequestHandler):
+    """Answers every POST like the Twilio Messages API does"""
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, keep-alive
+    # connections hit the 40 ms Nagle/delayed-ACK stall that Twilio doesn't have
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        body = b'{"sid": "SM00000000000000000000000000000000", "status": "queued"}'
+        self.send_response(201)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def legacy_send_sms(api_base, to_number, message_body):
+    """The pre-pooling send_sms, with the API host swapped for the stub"""
+    account_sid = os.getenv('TWILIO_ACCOUNT_SID')
+    auth_token = os.getenv('TWILIO_AUTH_TOKEN')
+    phone_number = os.getenv('TWILIO_PHONE_NUMBER')
+
+    url = f"{api_base}/2010-04-01/Accounts/{account_sid}/Messages.json"
+    response = requests.post(
+        url,
+        auth=(account_sid, auth_token),
+        data={'To': to_number, 'From': phone_number, 'Body': message_body}
+    )
+    return response.status_code == 201
+
+
+def measure(label, send, count):
+    latencies = []
+    for i in range(count):
+        start = time.perf_counter()
+        assert send(f"+1613555{i % 10000:04d}", "Benchmark message")
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:<28} mean {statistics.mean(latencies):7.3f} ms   p50 {p50:7.3f} ms   p99 {p99:7.3f} ms")
+    return statistics.mean(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=500)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubTwilioHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    os.environ.setdefault('TWILIO_ACCOUNT_SID', 'ACbenchmark')
+    os.environ.setdefault('TWILIO_AUTH_TOKEN', 'benchmark')
+    os.environ.setdefault('TWILIO_PHONE_NUMBER', '+15550000000')
+
+    from app import TwilioClient
+    client = TwilioClient(
+        os.environ['TWILIO_ACCOUNT_SID'],
+        os.environ['TWILIO_AUTH_TOKEN'],
+        os.environ['TWILIO_PHONE_NUMBER'],
+        api_base=api_base
+    )
+
+    print(f"Sending {args.messages} messages to stub server at {api_base}")
+    legacy = measure("legacy requests.post", lambda to, body: legacy_send_sms(api_base, to, body), args.messages)
+    pooled = measure("pooled TwilioClient", lambda to, body: client.send_message(to, body).status_code == 201, args.messages)
+    print(f"speedup: {legacy / pooled:.2f}x per message")
+
+    client.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
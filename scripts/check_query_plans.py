@@ -0,0 +1,79 @@
+"""
+Query plan check: every supported search_participants filter must be answered
+from an index, never a full scan of participants.
+
+Builds a scratch database with the app's schema, runs EXPLAIN QUERY PLAN on
+the query build_participant_search produces for each filter, and exits
+non-zero if any plan scans the participants table (or its indexes) end to end.
+
+Usage:
+    python scripts/check_query_plans.py [--verbose]
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import app
+
+# filter set -> index the plan is expected to use (None: any index search will do)
+CASES = [
+    ({}, 'idx_participants_consent_created'),
+    ({'gender': 'female'}, 'idx_participants_consent_gender'),
+    ({'phone_type': 'cell'}, 'idx_participants_consent_phone_type'),
+    ({'age_min': 18, 'age_max': 34}, 'idx_participants_consent_age'),
+    ({'age_min': 65}, 'idx_participants_consent_age'),
+    ({'age_exact': '40'}, 'idx_participants_consent_age'),
+    ({'region': 'ontario'}, None),
+    ({'education': 'college'}, None),
+    ({'vote_intent': 'ndp'}, None),
+    ({'has_email': True}, None),
+    ({'survey_sent': False}, 'idx_participants_consent_survey'),
+    ({'created_after': '2024-01-01', 'created_before': '2024-12-31'}, 'idx_participants_consent_created'),
+    ({'gender': 'male', 'age_min': 25, 'region': 'quebec'}, None),
+]
+
+
+def explain(conn, query, params):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--verbose', action='store_true', help="print every plan")
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        app.DB_PATH = os.path.join(tmp, 'plans.db')
+        app.init_database()
+        conn = app.connect_db()
+
+        for filters, expected_index in CASES:
+            query, params = app.build_participant_search(filters)
+            plan = explain(conn, query, params)
+            problems = []
+            if any(step.startswith('SCAN participants') for step in plan):
+                problems.append("full scan of participants")
+            if expected_index and not any(expected_index in step for step in plan):
+                problems.append(f"expected {expected_index}")
+
+            status = "FAIL" if problems else "ok"
+            print(f"{status:<4} {filters}" + (f"  ({'; '.join(problems)})" if problems else ""))
+            if problems or args.verbose:
+                for step in plan:
+                    print(f"       {step}")
+            failures += bool(problems)
+
+        conn.close()
+
+    if failures:
+        print(f"{failures} filter(s) regressed to a full scan or lost their index")
+        sys.exit(1)
+    print("All search filters use an index")
+
+
+if __name__ == '__main__':
+    main()